@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+########################################################################################################################################################
+##                                                   LIVING ANTHOLOGY DECKS BATCH LIST GENERATOR                                                      ##
+##                                                                                                                                                    ##
+##                  Non-interactive counterpart of main.py: generates the lists of several themes at once, one text file per theme.                   ##
+##                                     /!\ In order to run, this script requires Python 3.7+ as well as YAML. /!\                                     ##
+########################################################################################################################################################
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import generator as gen
+import solver
+
+# Data shared by all the lists, set once in each worker process (see init_worker)
+
+_shared = {}
+
+#############################################################################################
+
+def init_worker(cards:dict, names:list):
+  """
+  Stores the data of the cards of the pile in the worker process, so that they are sent only once per process instead of once per theme.
+  """
+
+  _shared['cards'] = cards
+  _shared['names'] = names
+
+#############################################################################################
+
+def run_theme(theme_data:dict, seed:int, engine:str="greedy", time_budget:float=1.0):
+  """
+  Generates the list of a theme, the cards being shuffled with their own random generator seeded with the given seed.
+  The list is selected either greedily (see generator.generate_list) or with the solver (see solver.solve_list).
+  """
+
+  names_list = list(_shared['names'])
+  if theme_data['name'] == gen.PILE_ANALYSIS:
+    names_list = sorted(names_list)
+  else:
+    random.Random(seed).shuffle(names_list)
+
+  if engine == "solver" and theme_data['name'] != gen.PILE_ANALYSIS:
+    return solver.solve_list(_shared['cards'], names_list, theme_data, time_budget)
+
+  return gen.generate_list(_shared['cards'], names_list, theme_data)
+
+#############################################################################################
+
+def select_themes(parser:argparse.ArgumentParser, config:dict, requested:list):
+  """
+  Checks the themes requested on the command line, all the themes of the configuration file being selected if there is none.
+  """
+
+  themes = requested or sorted(config['themes'].keys())
+
+  for theme in themes:
+    if theme not in config['themes'] and theme not in (gen.NO_THEME, gen.PILE_ANALYSIS):
+      parser.error("unknown theme '%s' (available themes: %s)" % (theme, ", ".join(sorted(config['themes'].keys()))))
+
+  return themes
+
+#############################################################################################
+
+def load_deck(config:dict, themes:list):
+  """
+  Loads the card pile, its Scryfall data and its tags, as well as the settings of the given themes (see generator.load_theme).
+  Returns the card pile, the settings of the themes and the data of the cards (see generator.prepare_cards).
+  """
+
+  card_pile = gen.load_pile(config)
+  card_store = gen.load_cards(config, card_pile)
+  tag_bits = gen.TagBits()
+  themes_data = [gen.load_theme(config, theme, tag_bits, len(card_pile)) for theme in themes]
+
+  ranks = gen.rank_limits(card_store)
+  gen.remove_missing_cards(config, card_pile)
+
+  catalogs = gen.load_catalogs()
+  tag_cache = gen.load_tag_cache(config, catalogs)
+  cards = gen.prepare_cards(card_pile, card_store, config, tag_cache, ranks, tag_bits, gen.snapshot_file(config))
+  tag_cache.save()
+
+  return card_pile, themes_data, cards
+
+#############################################################################################
+
+def main():
+
+  parser = argparse.ArgumentParser(description="Generates the lists of several themes of a deck without any interaction, writing one text file per theme.")
+  parser.add_argument("-c", "--config", default="dragons.yml", help="YAML configuration file of the deck (default: %(default)s)")
+  parser.add_argument("-t", "--themes", nargs="+", help="Themes to generate, \"%s\" included (default: all the themes of the configuration file)" % gen.NO_THEME)
+  parser.add_argument("-s", "--seeds", nargs="+", type=int, help="Seed of each theme, or a single seed used for all of them (default: random seeds, printed for reproducibility)")
+  parser.add_argument("-p", "--processes", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+  parser.add_argument("-o", "--output-dir", default=".", help="Directory where the lists are written (default: %(default)s)")
+  parser.add_argument("-e", "--engine", choices=["greedy", "solver"], help="Selection of the cards (default: the engine of the configuration file, greedy otherwise)")
+  parser.add_argument("--time-budget", type=float, help="Time budget of the solver for each theme, in seconds (default: the time budget of the configuration file, 1 otherwise)")
+  args = parser.parse_args()
+
+  start = time.time()
+
+  deck = os.path.splitext(os.path.basename(args.config))[0]
+  config = gen.load_config(args.config)
+
+  # Check the requested themes and their seeds
+
+  themes = select_themes(parser, config, args.themes)
+  engine = args.engine or config['general'].get('engine', 'greedy')
+  time_budget = args.time_budget if args.time_budget is not None else config['general'].get('time_budget', 1.0)
+
+  if not args.seeds:
+    seeds = [random.randrange(2**32) for theme in themes]
+  elif len(args.seeds) == 1:
+    seeds = args.seeds * len(themes)
+  elif len(args.seeds) == len(themes):
+    seeds = args.seeds
+  else:
+    parser.error("%s seeds were given for %s themes" % (len(args.seeds), len(themes)))
+
+  # Load the pile, its data and its tags once for all the themes
+
+  try:
+    card_pile, themes_data, cards = load_deck(config, themes)
+  except ValueError as error:
+    print(error)
+    exit(1)
+
+  print("{:<35} {:<15}".format("Deck: ", deck))
+  print("{:<35} {:<15}".format("Number of cards in the pile: ", len(card_pile)))
+  print("{:<35} {:<15}".format("Preparation time: ", "%.2f s" % (time.time() - start)))
+  print("")
+
+  # Generate the lists in parallel
+
+  os.makedirs(args.output_dir, exist_ok=True)
+
+  with ProcessPoolExecutor(max_workers=args.processes, initializer=init_worker, initargs=(cards, list(card_pile))) as executor:
+    futures = [executor.submit(run_theme, theme_data, seed, engine, time_budget) for theme_data, seed in zip(themes_data, seeds)]
+    for theme_data, seed, future in zip(themes_data, seeds, futures):
+      try:
+        results = future.result()
+      except ValueError as error:
+        print("{:<35} {:<15} {}".format(theme_data['name'] + ": ", "seed %s" % seed, error))
+        continue
+      filename = os.path.join(args.output_dir, deck.lower() + "_" + theme_data['name'].lower().replace(" ","_") + "_" + str(date.today()) + ".txt")
+      gen.write_list(results, filename)
+      print("{:<35} {:<15} {}".format(theme_data['name'] + ": ", "seed %s" % seed, filename))
+
+  print("\nTotal execution time: %.2f s" % (time.time() - start))
+
+# =================================================================== #
+# =================================================================== #
+#                          CALL MAIN FUNCTION                         #
+# =================================================================== #
+# =================================================================== #
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+########################################################################################################################################################
+##                                                    LIVING ANTHOLOGY DECKS GENERATOR BENCHMARK                                                      ##
+##                                                                                                                                                    ##
+##          Times each stage of the list generation on a deck with fixed seeds, and stores the results per commit to compare them over time.          ##
+##                                     /!\ In order to run, this script requires Python 3.7+ as well as YAML. /!\                                     ##
+########################################################################################################################################################
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import generator as gen
+import mtg_tagger
+import other_functions as of
+from card_store import NAME_ALIASES, CardStore
+from tag_cache import TagCache
+
+#############################################################################################
+
+def current_commit():
+  """
+  Returns the hash of the current git commit (with a "+" if the working tree has changes), or "unknown" outside of a git repository.
+  """
+
+  try:
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    changes = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return "unknown"
+
+  return commit + ("+" if changes else "")
+
+#############################################################################################
+
+def time_stage(timings:dict, stage:str, repeat:int, function, *args):
+  """
+  Runs the function repeat times and stores the minimum and median of its execution times (in seconds) under the name of the stage.
+  Returns the result of the last run.
+  """
+
+  times = []
+
+  for run in range(repeat):
+    start = time.perf_counter()
+    result = function(*args)
+    times.append(time.perf_counter() - start)
+
+  timings[stage] = {'min': min(times), 'median': statistics.median(times)}
+
+  return result
+
+#############################################################################################
+
+def run_benchmark(config_file:str, repeat:int, runs:int, seed:int):
+  """
+  Times each stage of the list generation (see generator) for the deck of the configuration file.
+  The generation of each theme is timed over runs lists, seeded from seed on, and reported per list.
+  """
+
+  timings = {}
+
+  # Loading stages
+
+  config = time_stage(timings, "config", repeat, gen.load_config, config_file)
+  card_pile = time_stage(timings, "pile_parse", repeat, gen.load_pile, config)
+
+  json_file = config['files']['scryfall_data']
+
+  def json_load():
+    with open(json_file, 'r', encoding='utf-8') as f:
+      return json.load(f)
+
+  time_stage(timings, "json_load", repeat, json_load)
+  card_store = time_stage(timings, "cards_load", repeat, lambda: CardStore(of.load_cards_data(json_file), NAME_ALIASES))
+
+  catalogs = time_stage(timings, "catalogs", repeat, gen.load_catalogs)
+  ranks = time_stage(timings, "ranks", repeat, gen.rank_limits, card_store)
+  gen.remove_missing_cards(config, card_pile)
+
+  # Tagging stages, without the tags computed during the previous runs
+
+  pile_cards = [card_store.get(name) for name in card_pile]
+  context = mtg_tagger.TaggerContext(catalogs)
+  time_stage(timings, "tagging", repeat, lambda: list(mtg_tagger.automatic_tags_many(pile_cards, context)))
+
+  # Preparation of the cards, first with an empty tag cache then with the tags it holds (see TagCache), and finally from the snapshot of the previous run
+
+  tag_bits = gen.TagBits()
+
+  with tempfile.TemporaryDirectory() as directory:
+    tag_cache = TagCache(os.path.join(directory, "tags.json"), catalogs)
+    snapshot = os.path.join(directory, "snapshot.pickle")
+    time_stage(timings, "prepare_cold", 1, gen.prepare_cards, card_pile, card_store, config, tag_cache, ranks, tag_bits)
+    cards = time_stage(timings, "prepare", repeat, gen.prepare_cards, card_pile, card_store, config, tag_cache, ranks, tag_bits)
+    gen.prepare_cards(card_pile, card_store, config, tag_cache, ranks, tag_bits, snapshot)
+    time_stage(timings, "prepare_snapshot", repeat, gen.prepare_cards, card_pile, card_store, config, tag_cache, ranks, tag_bits, snapshot)
+
+  # Generation stages, one per theme
+
+  themes = sorted(config['themes'].keys()) + [gen.NO_THEME]
+
+  lists = {}
+
+  for theme in themes:
+
+    theme_data = gen.load_theme(config, theme, tag_bits, len(card_pile))
+
+    def generate():
+      for run in range(runs):
+        names_list = list(card_pile)
+        random.Random(seed + run).shuffle(names_list)
+        results = gen.generate_list(cards, names_list, theme_data)
+      return results
+
+    lists[theme] = (theme_data, time_stage(timings, "generate:" + theme, repeat, generate))
+    timings["generate:" + theme] = {statistic: value / runs for statistic, value in timings["generate:" + theme].items()}
+
+  # Rendering of the reports
+
+  def render():
+    with contextlib.redirect_stdout(io.StringIO()):
+      for theme, (theme_data, results) in lists.items():
+        gen.print_recap("benchmark", config, card_pile, ranks, theme_data)
+        gen.print_results(results, theme_data, ranks)
+
+  time_stage(timings, "render", repeat, render)
+
+  return timings
+
+#############################################################################################
+
+def print_timings(timings:dict, reference:dict=None):
+  """
+  Prints the timings of the stages, compared to the reference timings if any.
+  """
+
+  column_sizes = "{:<40} {:>12} {:>12} {:>10}"
+  print(column_sizes.format("Stage", "Min (ms)", "Median (ms)", "Change"))
+  print(''.center(77, '-'))
+
+  for stage, values in timings.items():
+    change = ""
+    if reference and stage in reference and reference[stage]['median'] > 0:
+      change = "{:+.1%}".format(values['median'] / reference[stage]['median'] - 1)
+    print(column_sizes.format(stage, "%.3f" % (values['min'] * 1000), "%.3f" % (values['median'] * 1000), change))
+
+#############################################################################################
+
+def main():
+
+  parser = argparse.ArgumentParser(description="Times each stage of the list generation on a deck with fixed seeds, and stores the results per commit.")
+  parser.add_argument("-c", "--config", default="dragons.yml", help="YAML configuration file of the deck (default: %(default)s)")
+  parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of times each stage is timed (default: %(default)s)")
+  parser.add_argument("-n", "--runs", type=int, default=20, help="Number of lists generated per theme and per repetition (default: %(default)s)")
+  parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the first list of each theme (default: %(default)s)")
+  parser.add_argument("-o", "--output", default="benchmarks.json", help="JSON file where the results are stored per commit (default: %(default)s)")
+  parser.add_argument("--compare", metavar="COMMIT", help="Stored commit to compare the results with (default: the last stored commit other than the current one)")
+  args = parser.parse_args()
+
+  commit = current_commit()
+
+  if os.path.isfile(args.output):
+    with open(args.output, 'r', encoding='utf-8') as f:
+      stored = json.load(f)
+  else:
+    stored = {}
+
+  timings = run_benchmark(args.config, args.repeat, args.runs, args.seed)
+
+  # Find the results to compare with
+
+  if args.compare:
+    matches = [key for key in stored if key.startswith(args.compare)]
+    if not matches:
+      parser.error("no stored results for commit %s in %s" % (args.compare, args.output))
+    reference_commit = matches[-1]
+  else:
+    previous = [key for key in stored if key != commit]
+    reference_commit = previous[-1] if previous else None
+
+  print("{:<35} {:<15}".format("Commit: ", commit))
+  print("{:<35} {:<15}".format("Compared with: ", reference_commit or "None"))
+  print("")
+  print_timings(timings, stored[reference_commit]['timings'] if reference_commit else None)
+
+  # Store the results of this commit
+
+  stored.pop(commit, None)
+  stored[commit] = {
+    'date': datetime.now().isoformat(timespec='seconds'),
+    'python': platform.python_version(),
+    'config': args.config,
+    'repeat': args.repeat,
+    'runs': args.runs,
+    'seed': args.seed,
+    'timings': timings
+  }
+
+  with open(args.output, 'w', encoding='utf-8') as f:
+    json.dump(stored, f, indent=2)
+
+  print("\nThe results have been stored in %s" % args.output)
+
+# =================================================================== #
+# =================================================================== #
+#                          CALL MAIN FUNCTION                         #
+# =================================================================== #
+# =================================================================== #
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,128 @@
+import glob
+import json
+import os
+from collections import OrderedDict
+
+import other_functions as of
+import scryfall_api
+from card_store import NAME_ALIASES, CardStore
+
+# Scryfall data files looked up by default: those compiled for the card piles (see other_functions.get_cards_data), the other JSON files sharing their prefix (tags caches, unresolved names) being left out
+
+DATA_FILES = "scryfall_*.json"
+
+# On-disk cache of the cards fetched from Scryfall, and the number of cards it keeps (the least recently used ones being dropped first)
+
+LOOKUP_CACHE = "mtg_tagger_lookups.json"
+LOOKUP_CACHE_SIZE = 500
+
+#############################################################################################
+
+def default_data_files():
+  """
+  Returns the Scryfall data files of the card piles in the current directory (see DATA_FILES).
+  """
+
+  return sorted(file for file in glob.glob(DATA_FILES) if is_card_list(file))
+
+def is_card_list(file:str):
+  """
+  Returns whether the JSON file holds a list (of cards), rather than an object as the tags caches and the unresolved names do.
+  """
+
+  try:
+    with open(file, 'rb') as f:
+      return f.read(64).lstrip()[:1] == b"["
+  except OSError:
+    return False
+
+#############################################################################################
+
+class CardLookup:
+  """
+  Finds the Scryfall data of a card by its name, looking first in the local Scryfall data files, then in the cache of the previous remote lookups and only then on Scryfall.
+  The names are case-insensitive, and the local cards can also be found by the names of their faces, their flavor names or their aliases (see CardStore).
+  The remote lookups are kept in a JSON file, bounded to the cache_size most recently used cards. Each card is stored once under its lowercase name, the names it was looked up with pointing to it.
+  """
+
+  def __init__(self, data_files:list=None, cache_file:str=LOOKUP_CACHE, cache_size:int=LOOKUP_CACHE_SIZE):
+
+    self.cache_file = cache_file
+    self.cache_size = cache_size
+    self.changed = False
+
+    # Index the local cards by lowercase name
+
+    self.local = {}
+
+    for file in (default_data_files() if data_files is None else data_files):
+      try:
+        card_store = CardStore(of.load_cards_data(file), NAME_ALIASES)
+      except (OSError, ValueError, TypeError, KeyError):
+        continue
+      for name, card in card_store.index.items():
+        self.local.setdefault(name.lower(), card)
+
+    # Load the previous remote lookups: the cards, from the least to the most recently used, and the names they were looked up with
+
+    self.remote = OrderedDict()
+    self.aliases = {}
+
+    if os.path.isfile(cache_file):
+      try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+          cache = json.load(f)
+        self.remote = OrderedDict(cache['cards'])
+        self.aliases = {key: name for key, name in cache['aliases'].items() if name in self.remote}
+      except (ValueError, TypeError, KeyError, AttributeError):
+        # Unreadable cache or cache of an older layout, the cards will be looked up again
+        self.remote = OrderedDict()
+        self.aliases = {}
+
+  def find(self, card_name:str):
+    """
+    Returns the Scryfall data of the card and where they were found ("local data", "lookup cache" or "Scryfall").
+    Raises scryfall_api.ScryfallError if Scryfall does not know the card either.
+    """
+
+    key = card_name.strip().lower()
+
+    if key in self.local:
+      return self.local[key], "local data"
+
+    if key in self.aliases:
+      name = self.aliases[key]
+      self.remote.move_to_end(name)
+      self.changed = True
+      return self.remote[name], "lookup cache"
+
+    card = of.project_card(scryfall_api.search_card(card_name.strip()))
+    name = card['name'].lower()
+
+    self.remote[name] = card
+    self.remote.move_to_end(name)
+    self.aliases[key] = name
+    self.aliases[name] = name
+
+    # Drop the least recently used cards, with all the names pointing to them
+
+    while len(self.remote) > self.cache_size:
+      dropped, _ = self.remote.popitem(last=False)
+      self.aliases = {alias: name for alias, name in self.aliases.items() if name != dropped}
+
+    self.changed = True
+
+    return card, "Scryfall"
+
+  def save(self):
+    """
+    Writes the cache of the remote lookups, if it changed since it was loaded. Meant to be called once, at the end of the session.
+    """
+
+    if not self.changed:
+      return
+
+    with open(self.cache_file, 'w', encoding='utf-8') as f:
+      json.dump({'cards': self.remote, 'aliases': self.aliases}, f, separators=(',', ':'))
+
+    self.changed = False
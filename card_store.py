@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+# Aliases of the cards that are known under another name (reskins for ex)
+
+NAME_ALIASES = {
+    "Stardrake": "Scourge of the Throne",
+}
+
+# Number of days during which a name that could not be resolved to a card is not looked up again (see UnresolvedNames)
+
+UNRESOLVED_TTL = 7
+
+#############################################################################################
+
+class CardStore:
+  """
+  Scryfall data of the cards, indexed for constant time lookups by name.
+  A card can be found by its name, the names of its faces, its flavor names (e.g. for Godzilla series reskins) or any alias defined for it.
+  """
+
+  def __init__(self, cards:list, aliases:dict=None):
+
+    self.cards = cards
+    self.index = {}
+
+    # Index the different names, the card names taking precedence over the other ones
+
+    for card in cards:
+      self.index.setdefault(card['name'], card)
+
+    for card in cards:
+      for face in card.get('card_faces',[]):
+        self.index.setdefault(face['name'], card)
+        if face.get('flavor_name'):
+          self.index.setdefault(face['flavor_name'], card)
+      if card.get('flavor_name'):
+        self.index.setdefault(card['flavor_name'], card)
+
+    # Aliases point to the card of their real name
+
+    for alias, real_name in (aliases or {}).items():
+      if real_name in self.index:
+        self.index.setdefault(alias, self.index[real_name])
+
+  def get(self, name:str, default=None):
+    """
+    Returns the Scryfall data of the card known under the given name (or default if there is none).
+    """
+
+    return self.index.get(name, default)
+
+  def __contains__(self, name:str):
+    return name in self.index
+
+  def __iter__(self):
+    return iter(self.cards)
+
+  def __len__(self):
+    return len(self.cards)
+
+#############################################################################################
+
+class UnresolvedNames:
+  """
+  Names of the pile that could not be resolved to a card, with the reason and the time of their last lookup, stored as a JSON file.
+  Those names are not looked up again before their entry expires (after ttl days), so that a typo in the pile does not trigger a new fetch of the Scryfall data on every run.
+  """
+
+  def __init__(self, file:str, ttl:float=UNRESOLVED_TTL):
+
+    self.file = file
+    self.ttl = ttl * 86400
+    self.names = {}
+    self.modified = False
+
+    if os.path.isfile(file):
+      try:
+        with open(file, 'r', encoding='utf-8') as f:
+          self.names = json.load(f)
+      except ValueError:
+        self.names = {}
+
+  def __contains__(self, name:str):
+    entry = self.names.get(name)
+    return entry is not None and time.time() - entry['time'] < self.ttl
+
+  def add(self, name:str, reason:str):
+    """
+    Records that the name could not be resolved, for the given reason.
+    """
+
+    self.names[name] = {'reason': reason, 'time': time.time()}
+    self.modified = True
+
+  def discard(self, name:str):
+    """
+    Forgets a name that can now be resolved.
+    """
+
+    if self.names.pop(name, None) is not None:
+      self.modified = True
+
+  def save(self):
+    """
+    Writes the file of the unresolved names if it has changed since it was loaded.
+    """
+
+    if not self.modified:
+      return
+
+    with open(self.file, 'w', encoding='utf-8') as f:
+      json.dump(self.names, f, indent=2)
+
+    self.modified = False
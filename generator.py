@@ -0,0 +1,938 @@
+########################################################################################################################################################
+##                                                     LIST GENERATOR: PILE LOADING AND SELECTION                                                     ##
+##                                                                                                                                                    ##
+##                           Building blocks shared by the interactive generator (main.py) and its non-interactive entry points.                      ##
+########################################################################################################################################################
+
+import itertools
+import os
+import pickle
+import re
+import statistics
+from collections import OrderedDict
+
+import yaml
+
+import other_functions as of
+from card_store import NAME_ALIASES, UNRESOLVED_TTL, CardStore, UnresolvedNames
+from tag_cache import TagCache
+
+# Names of the special choices of theme
+
+NO_THEME = "No Theme"
+RANDOM_THEME = "Pick a Theme for Me"
+PILE_ANALYSIS = "Pile Analysis"
+
+# Version of the format of the snapshots of the prepared cards (see prepare_cards), older snapshots being ignored
+
+SNAPSHOT_VERSION = 1
+
+# Prefixes of the tags of the card pile that change how the card is handled
+
+PREFIX_EXC = "except_"
+PREFIX_IGN = "ignore_"
+PREFIX_RES = "only_"
+
+# =================================================================== #
+# =================================================================== #
+#                       LOAD THE PILE AND ITS DATA                    #
+# =================================================================== #
+# =================================================================== #
+
+def load_config(config_file:str):
+  """
+  Loads the YAML configuration file of a deck.
+  """
+
+  with open(config_file, 'r', encoding='utf-8') as f_config:
+    config = yaml.load(f_config, Loader=yaml.FullLoader)
+
+  return config
+
+#############################################################################################
+
+def load_pile(config:dict, verbose:bool=False):
+  """
+  Loads the card pile of the deck, mapping the aliases to the real names of the cards (see NAME_ALIASES).
+  """
+
+  card_pile = of.parse_list(config['files']['cards_pile'])
+  if verbose:
+    print(card_pile)
+
+  cleaned_card_pile = {}
+  for key, value in card_pile.items():
+      real_name = NAME_ALIASES.get(key, key) # if key is an alias, map to real; else keep
+      cleaned_card_pile[real_name] = value
+
+  return cleaned_card_pile
+
+#############################################################################################
+
+def load_cards(config:dict, card_pile:dict):
+  """
+  Loads the Scryfall data of the cards of the pile, fetching them first if the data file does not exist yet or misses some of the cards (see scryfall_api).
+  The names that cannot be resolved to a card are recorded (see UnresolvedNames), reported once and removed from the card pile, so that they do not trigger a new fetch on every run.
+  Returns the data indexed by card names.
+  """
+
+  json_file = config['files']['scryfall_data']
+  bulk_file = config['files'].get('scryfall_bulk')
+  unresolved_file = config['files'].get('unresolved_cards', os.path.splitext(json_file)[0] + "_unresolved.json")
+  unresolved = UnresolvedNames(unresolved_file, config['files'].get('unresolved_ttl', UNRESOLVED_TTL))
+
+  prune = config['files'].get('prune_scryfall_data',False)
+
+  if not os.path.isfile(json_file):
+    # If the file doesn't exist, create it and load it
+    of.get_cards_data(card_pile,json_file,bulk_file=bulk_file,unresolved=unresolved)
+    scryfall_data = of.load_cards_data(json_file)
+  else:
+    scryfall_data = of.load_cards_data(json_file)
+
+    # If any card in card_pile is missing (by name, face name, flavor_name or alias) and was not already found to be unresolvable, update and reload
+    # With the pruning option, the cards that are no longer in the pile are also removed from the file
+    card_store = CardStore(scryfall_data, NAME_ALIASES)
+    missing = any(name not in card_store and name not in unresolved for name in card_pile.keys())
+    stale = prune and len(set(card['id'] for card in scryfall_data)) > len(set(card_store.get(name)['id'] for name in card_pile.keys() if name in card_store))
+    if missing or stale:
+      of.get_cards_data(card_pile,json_file,update=True,prune=prune,bulk_file=bulk_file,unresolved=unresolved)
+      scryfall_data = of.load_cards_data(json_file)
+
+  card_store = CardStore(scryfall_data, NAME_ALIASES)
+
+  # Leave the unresolved names out of the pile, and forget those that can now be resolved
+
+  for name in list(card_pile.keys()):
+    if name in card_store:
+      unresolved.discard(name)
+      continue
+    if name not in unresolved:
+      print("WARNING: %s does not match any card of %s" % (name, json_file))
+      unresolved.add(name, "Does not match any card of %s" % json_file)
+    card_pile.pop(name)
+
+  unresolved.save()
+
+  return card_store
+
+#############################################################################################
+
+def remove_missing_cards(config:dict, card_pile:dict):
+  """
+  Removes from the card pile the cards listed in the missing cards file, if there is one.
+  """
+
+  missing_file = config['files'].get('missing_cards')
+
+  if missing_file and os.path.isfile(missing_file):
+
+    with open(missing_file, 'r') as f:
+      missing_cards = f.read().splitlines()
+
+    for card in missing_cards:
+      if card[0:2] == "1 ":
+        card = card[2:]
+      card_pile.pop(card, None)
+
+#############################################################################################
+
+def load_catalogs(catalog_file:str="catalogs.txt"):
+  """
+  Loads the Scryfall catalogs used by the tagger, fetching them first if needed.
+  """
+
+  if not os.path.exists(catalog_file):
+    of.get_catalog(catalog_file)
+
+  with open(catalog_file, 'r') as f:
+    catalogs = f.read().splitlines()
+
+  return catalogs
+
+#############################################################################################
+
+def load_tag_cache(config:dict, catalogs:list):
+  """
+  Loads the automatic tags computed during the previous runs (see TagCache).
+  """
+
+  json_file = config['files']['scryfall_data']
+  tags_cache_file = config['files'].get('tags_cache', os.path.splitext(json_file)[0] + "_tags.json")
+
+  return TagCache(tags_cache_file, catalogs)
+
+#############################################################################################
+
+def rank_limits(card_store:CardStore):
+  """
+  Defines the EDHrec rank median of the pile, as well as the limits of the 25% most popular cards and 25% least popular cards.
+  """
+
+  ranks = [card['edhrec_rank'] for card in card_store if card.get('edhrec_rank')]
+  pile_median = statistics.median(ranks)
+  upper_ranks = [rank for rank in ranks if rank < pile_median]
+  lower_ranks = [rank for rank in ranks if rank >= pile_median]
+
+  return {
+    'median': pile_median,
+    'popular': int(statistics.median(upper_ranks)),
+    'unpopular': int(statistics.median(lower_ranks))
+  }
+
+# =================================================================== #
+# =================================================================== #
+#                          PREPARE THE CARDS                          #
+# =================================================================== #
+# =================================================================== #
+
+class TagBits:
+  """
+  Interns the tags of the cards and themes to bit positions, so that a set of tags can be stored as an integer mask and compared to another one with a single bitwise AND.
+  The same instance must be used for the cards and for the themes they are compared to.
+  """
+
+  def __init__(self):
+
+    self.bits = {}
+
+  def mask(self, tags):
+    """
+    Returns the mask of the given tags, new tags being given the next free bit.
+    """
+
+    mask = 0
+    for tag in tags:
+      mask |= 1 << self.bits.setdefault(tag, len(self.bits))
+
+    return mask
+
+#############################################################################################
+
+class SecondaryTags:
+  """
+  Rules of the secondary tags of the configuration file, compiled once for all the cards.
+  Each secondary tag is given to a card that has any of its positive conditions, or lacks any of its negated ones (e.g. -flying).
+  A condition can be another secondary tag, the rules being evaluated in topological order so that chained rules work. Rules depending on each other in a cycle raise a ValueError.
+  """
+
+  def __init__(self, secondary_tags:dict):
+
+    # Parse the conditions of each rule
+
+    conditions = {}
+    for new_tag, tags in (secondary_tags or {}).items():
+      condition_tags = [tag.strip() for tag in tags.split(',') if tag.strip() != '']
+      conditions[new_tag] = (
+        frozenset(tag for tag in condition_tags if not tag.startswith('-')),
+        tuple(tag[1:] for tag in condition_tags if tag.startswith('-'))
+      )
+
+    # Sort the rules so that each one comes after the secondary tags it depends on (a rule referring to its own tag only checks the tags of the card)
+
+    self.order = list(conditions.keys())
+    self.rules = []
+    state = {}
+
+    def visit(new_tag, path):
+      if state.get(new_tag) == 'done':
+        return
+      if state.get(new_tag) == 'visiting':
+        cycle = path[path.index(new_tag):] + [new_tag]
+        raise ValueError("The secondary tags depend on each other in a cycle: %s" % " -> ".join(cycle))
+      state[new_tag] = 'visiting'
+      positive, negated = conditions[new_tag]
+      for tag in list(positive) + list(negated):
+        if tag in conditions and tag != new_tag:
+          visit(tag, path + [new_tag])
+      state[new_tag] = 'done'
+      self.rules.append((new_tag, positive, negated))
+
+    for new_tag in self.order:
+      visit(new_tag, [])
+
+  def __bool__(self):
+    return bool(self.rules)
+
+  def apply(self, card_tags):
+    """
+    Returns the secondary tags of a card with the given tags, in the order of the configuration file.
+    """
+
+    present = set(card_tags)
+    added = set()
+
+    for new_tag, positive, negated in self.rules:
+      if not positive.isdisjoint(present) or any(tag not in present for tag in negated):
+        present.add(new_tag)
+        added.add(new_tag)
+
+    return [new_tag for new_tag in self.order if new_tag in added]
+
+#############################################################################################
+
+def rank_statuses(rank:int, ranks:dict):
+  """
+  Returns the popularity statuses of a card with the given EDHrec rank, according to the rank limits of the pile (see rank_limits).
+  """
+
+  return {
+    'popular': True if rank <= ranks['popular'] else False,
+    'unpopular': True if rank >= ranks['unpopular'] else False
+  }
+
+#############################################################################################
+
+def prepare_card(name:str, card_pile:dict, card_store:CardStore, config:dict, tag_cache:TagCache, ranks:dict, tag_bits:TagBits, secondary_tags:SecondaryTags=None):
+  """
+  Gathers the data of a card of the pile needed for the selection: mana value and costs, EDHrec rank, tags (those of the pile, the automatic and the secondary ones) and statuses.
+  Those data do not depend on the theme, the status of card restricted to the theme being checked during the selection.
+  The tags are also stored as a mask (see TagBits), along with whether the card is restricted to some themes, and the mana costs as colour counts (see other_functions.colour_counts).
+  """
+
+  tagger = config['general'].get('auto_tagger', True)
+  if secondary_tags is None:
+    secondary_tags = SecondaryTags(config.get('secondary_tags'))
+
+  # Get the Scryfall data for this card
+  scryfall_card = card_store.get(name)
+  mana_value = int(scryfall_card['cmc'])
+
+  if "card_faces" in scryfall_card:
+    mana_costs = [scryfall_card['card_faces'][0]['mana_cost'],scryfall_card['card_faces'][1]['mana_cost']]
+  else:
+    mana_costs = [scryfall_card['mana_cost']]
+
+  rank = scryfall_card.get('edhrec_rank', ranks['median'])
+
+  # Get the automatic card tags if needed
+  if not tagger:
+    auto_tags = {}
+    auto_tags_list = []
+  else:
+    auto_tags = tag_cache.automatic_tags(scryfall_card)
+    auto_tags_list = list(itertools.chain(*list(auto_tags.values()))) #Flatten the list of lists into a single list
+    auto_tags_list = list(map(str.lower, auto_tags_list))
+
+    # Remove automatic tags that need to be explicitly ignored
+
+    for tag in [tag for tag in card_pile[name] if tag.startswith(PREFIX_IGN)]:
+      ignored = tag.partition(PREFIX_IGN)[2]
+
+      if ignored in auto_tags_list:
+        auto_tags_list.remove(ignored)
+        for category in auto_tags.keys():
+          if ignored in auto_tags[category]:
+            auto_tags[category].remove(ignored)
+
+      elif ignored.endswith("_*"):
+        root_tag = ignored.partition("_*")[0]
+        for tag in [tag for tag in auto_tags_list if tag.startswith(root_tag)]:
+          auto_tags_list.remove(tag)
+          for category in auto_tags.keys():
+            if tag in auto_tags[category]:
+              auto_tags[category].remove(tag)
+
+  # Check secondary tags
+  if secondary_tags:
+    second_tags_list = secondary_tags.apply(card_pile[name] + auto_tags_list)
+    auto_tags_list += second_tags_list
+    auto_tags['secondary'] = second_tags_list
+
+  # Merge the automatic tags and the tags of the card pile
+  card_tags = card_pile[name] + auto_tags_list
+  card_tags = list(dict.fromkeys(card_tags)) # Remove possible duplicates
+
+  # Check statuses
+  card_status = {
+    **rank_statuses(rank, ranks),
+    'illegal': True if scryfall_card['legalities']['commander'] != "legal" else False,
+    'bad_synergy': True if "bad_synergy" in card_tags else False,
+    'mana_sink': True if "mana_sink" in card_tags else False
+  }
+
+  # Define the card_data dictionary
+  card_data = {
+    "name": name,
+    "mv": mana_value,
+    "mana_costs": mana_costs,
+    "colour_counts": [of.colour_counts(mana_cost) for mana_cost in mana_costs],
+    "tags": card_tags,
+    "tags_mask": tag_bits.mask(card_tags),
+    "restricted": any(tag.startswith(PREFIX_RES) for tag in card_tags),
+    "auto_tags": auto_tags,
+    "rank": rank,
+    "status" : card_status
+  }
+
+  return card_data
+
+#############################################################################################
+
+def snapshot_file(config:dict):
+  """
+  Returns the file where the prepared cards of the deck are stored between the runs (see prepare_cards).
+  """
+
+  json_file = config['files']['scryfall_data']
+
+  return config['files'].get('pile_snapshot', os.path.splitext(json_file)[0] + "_snapshot.pickle")
+
+#############################################################################################
+
+def prepare_cards(card_pile:dict, card_store:CardStore, config:dict, tag_cache:TagCache, ranks:dict, tag_bits:TagBits, snapshot:str=None):
+  """
+  Prepares the data of all the cards of the pile (see prepare_card), in the order of the pile.
+  The automatic tags missing from the cache are first computed for the whole pile at once, across several processes (see TagCache.pretag), and the rules of the secondary tags are compiled once (see SecondaryTags).
+
+  If a snapshot file is given, the cards prepared during the previous run are reused if neither their tags in the pile nor their Scryfall data have changed, and the snapshot is then updated.
+  The whole snapshot is discarded if anything the tags of the cards depend on has changed: the automatic tagger (its settings or its version) or the secondary tags.
+  The rank and the popularity statuses of the reused cards are computed again, as the rank limits of the pile change with almost any edit of the pile (see rank_limits).
+  """
+
+  settings = {
+    'version': SNAPSHOT_VERSION,
+    'auto_tagger': config['general'].get('auto_tagger', True),
+    'secondary_tags': config.get('secondary_tags'),
+    'tagger': tag_cache.fingerprint
+  }
+
+  previous = {}
+  if snapshot and os.path.isfile(snapshot):
+    try:
+      with open(snapshot, 'rb') as f:
+        content = pickle.load(f)
+      if content.get('settings') == settings:
+        previous = content['cards']
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+      previous = {}
+
+  # Only the cards that are new or have changed since the previous run are prepared again
+
+  changed = [name for name in card_pile if name not in previous or previous[name]['pile_tags'] != card_pile[name] or previous[name]['scryfall'] != card_store.get(name)]
+
+  if changed:
+    secondary_tags = SecondaryTags(config.get('secondary_tags'))
+    if settings['auto_tagger']:
+      tag_cache.pretag([card_store.get(name) for name in changed])
+    prepared = {name:prepare_card(name, card_pile, card_store, config, tag_cache, ranks, tag_bits, secondary_tags) for name in changed}
+  else:
+    prepared = {}
+
+  # The masks of the reused cards are computed again, as the bits of the tags are only valid for this run (see TagBits), as well as their rank and popularity statuses
+
+  cards = {}
+  for name in card_pile:
+    if name in prepared:
+      cards[name] = prepared[name]
+    else:
+      card_data = previous[name]['data']
+      rank = card_store.get(name).get('edhrec_rank', ranks['median'])
+      cards[name] = dict(card_data, tags_mask=tag_bits.mask(card_data['tags']), rank=rank, status=dict(card_data['status'], **rank_statuses(rank, ranks)))
+
+  if snapshot and (changed or len(previous) != len(card_pile)):
+    content = {
+      'settings': settings,
+      'cards': {name:{'pile_tags': list(card_pile[name]), 'scryfall': card_store.get(name), 'data': card_data} for name, card_data in cards.items()}
+    }
+    with open(snapshot, 'wb') as f:
+      pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+  return cards
+
+# =================================================================== #
+# =================================================================== #
+#                          GENERATE THE LIST                          #
+# =================================================================== #
+# =================================================================== #
+
+def load_theme(config:dict, theme_name:str, tag_bits:TagBits, pile_size:int=0):
+  """
+  Gathers the settings of a theme: its tags, smart fill and ban options, and the limitations of the list (the theme-specific limitations overriding the general ones).
+  The groups of tags, the banned tags and the tags restricting or excluding cards from the theme are also compiled to masks (see TagBits), the hard costs to matchers (see other_functions.HardCostMatcher) and the mana curve to an empty tracker (see other_functions.CurveTracker).
+  For the pile analysis, all the cards of the pile (pile_size) are listed without any limitation.
+  """
+
+  if not config['themes'].get(theme_name):
+    theme_config = {}
+    tags = OrderedDict({})
+    smart_fill = False
+    banned = []
+  else:
+    theme_config = config['themes'][theme_name]
+    tags = OrderedDict((tags.lower(), number) for tags,number in theme_config['tags'].items())
+    smart_fill = theme_config.get('smart_fill',True)
+    if theme_config.get('ban',None):
+      banned = [tag.strip() for tag in theme_config['ban'].split(',') if tag != '']
+    else:
+      banned = []
+
+  # Update general limitations with theme-specific limitations if needed
+
+  limitations = dict(config['limitations'])
+  if theme_config.get('limitations'):
+    limitations.update(theme_config['limitations'])
+
+  # Load limitations
+
+  number_cards = config['general']['number_cards']
+  curve = limitations['mana_curve']
+
+  if number_cards > sum(curve.values()):
+    raise ValueError("The number of cards in the desired list (%s) is greater than the total number of cards in the desired mana curve (%s)" % (number_cards,sum(curve.values())))
+
+  hard_costs = limitations.get('hard_costs',{})
+
+  max_status = {
+    'restricted': limitations.get('max_restricted',float('inf')),
+    'popular': limitations.get('max_pop',float('inf')),
+    'unpopular': limitations.get('max_unpop',float('inf')),
+    'illegal': limitations.get('max_illegal',float('inf')),
+    'bad_synergy': limitations.get('max_bad_synergy',float('inf')),
+    'mana_sink': limitations.get('max_sink',float('inf'))
+  }
+
+  # Maximum number of cards for some tags (only enforced by the solver for now, see solver.solve_list)
+
+  limited_tags = dict(limitations.get('limited_tags',{}))
+
+  # Alter the counters for analysis modes
+
+  if theme_name == PILE_ANALYSIS:
+    number_cards = pile_size
+    curve = {mv : float('inf') for mv in curve}
+    max_status = {status : float('inf') for status in max_status}
+    hard_costs = {costs : float('inf') for costs in hard_costs}
+    limited_tags = {tag : float('inf') for tag in limited_tags}
+
+  # Compile the tags to masks, including the 'restricted' and 'filler' groups added during the selection
+
+  groups = list(tags.keys()) + ['restricted', 'filler']
+
+  masks = {
+    "groups": {group: tag_bits.mask(tag.strip() for tag in group.split(',') if tag != '') for group in groups},
+    "banned": tag_bits.mask(banned),
+    "restricted": tag_bits.mask([(PREFIX_RES + theme_name).lower()]),
+    "excluded": tag_bits.mask([(PREFIX_EXC + theme_name).lower()]),
+    "limited": {tag: tag_bits.mask([tag]) for tag in limited_tags}
+  }
+
+  return {
+    "name": theme_name,
+    "tags": tags,
+    "masks": masks,
+    "smart_fill": smart_fill,
+    "banned": banned,
+    "number_cards": number_cards,
+    "curve": curve,
+    "curve_tracker": of.CurveTracker(curve),
+    "hard_costs": hard_costs,
+    "hard_costs_matchers": of.compile_hard_costs(hard_costs),
+    "max_status": max_status,
+    "limited_tags": limited_tags
+  }
+
+#############################################################################################
+
+def list_reason(card_data:dict, raw_theme_tags:str):
+  """
+  Defines the reason a card was added to the list for the given group of tags: the tags it has in common with the group, or the name of the 'restricted' and 'filler' groups.
+  """
+
+  if raw_theme_tags == 'filler':
+    return "FILLER"
+  elif raw_theme_tags == 'restricted':
+    return "RESTRICTED"
+  else:
+    common_tags = list(set(card_data['tags']).intersection(tag.strip() for tag in raw_theme_tags.split(',') if tag != ''))
+    return ", ".join(map(lambda x:x.upper(),common_tags))
+
+#############################################################################################
+
+def list_entry(card_data:dict, reason:str, card_status:dict):
+  """
+  Returns the entry of a chosen card in the list: a copy of its data, with the reason it was chosen, its statuses for the theme and its mana costs formatted for display.
+  """
+
+  if len(card_data['mana_costs']) > 1 and card_data['mana_costs'][1].strip() != "":
+    mana_costs = " // ".join([" ".join(re.sub(r'[\{\}]', '', cost)) for cost in card_data['mana_costs']])
+  else:
+    mana_costs = " ".join(re.sub(r'[\{\}]', '', card_data['mana_costs'][0]))
+
+  return dict(card_data, mana_costs=mana_costs, reason=reason, status=card_status)
+
+#############################################################################################
+
+def generate_list(cards:dict, names_list:list, theme_data:dict, verbose:bool=False):
+  """
+  Selects the cards of the list for the theme, walking the groups of tags of the theme and picking the first eligible cards of names_list for each of them.
+  The data of the cards (see prepare_cards) are not modified, so that they can be reused for several lists.
+  Returns the chosen cards (with the reason they were chosen and their mana costs formatted for display) along with the counters of the list.
+  """
+
+  inp_theme = theme_data['name']
+  smart_fill = theme_data['smart_fill']
+  number_cards = theme_data['number_cards']
+  hard_costs = theme_data['hard_costs']
+  hard_costs_matchers = theme_data['hard_costs_matchers']
+
+  # Initialize some variables
+
+  curve_tracker = theme_data['curve_tracker'].copy()
+  current_costs = {costs:0 for costs in hard_costs}
+  lim_status = {status: {'count': 0, 'max': maximum} for status, maximum in theme_data['max_status'].items()}
+
+  card_list = []
+  added_names = set()
+
+  filler_count = 0
+
+  # Masks of the theme (see TagBits)
+
+  masks = theme_data['masks']
+  restricted_mask = masks['restricted']
+  skip_mask = masks['excluded'] | masks['banned']
+
+  # If the smart fill option is enabled, adapt the numbers
+
+  theme_tags_numbers = theme_data['tags'].copy()
+
+  if smart_fill:
+
+    cumulative_number = 0
+
+    for tags,number in theme_data['tags'].items():
+      cumulative_number += number
+      theme_tags_numbers[tags] = cumulative_number
+
+  # Add a first 'restricted' tag that prioritizes addition of cards restricted to this theme if they are any.
+
+  theme_tags_numbers['restricted'] = number_cards
+  theme_tags_numbers.move_to_end('restricted', last = False) # Bring the 'restricted' key to the start of the dict
+
+  # Add a last 'filler' tag that allows addition of filler cards if needed
+
+  theme_tags_numbers['filler'] = number_cards
+
+  # Iterate over the group of tags in the theme and find cards for each of them
+
+  for raw_theme_tags in theme_tags_numbers.keys():
+
+    group_mask = masks['groups'][raw_theme_tags]
+
+    if not smart_fill:
+      current_number = 0
+
+    for name in names_list:
+
+      # Skip the card if it was already added
+      if name in added_names:
+        continue
+
+      card_data = cards[name]
+      tags_mask = card_data['tags_mask']
+      restricted = bool(tags_mask & restricted_mask)
+
+      # Skip cards that have been explicitly excluded from this theme
+      if tags_mask & skip_mask:
+        continue
+
+      # Skip cards that cannot be included in this theme
+      if card_data['restricted'] and not restricted:
+        continue
+
+      # Check if the card is eligible, either restricted to this theme, having a tag in common with the current tags or as a filler
+      if raw_theme_tags == 'restricted':
+        eligible = restricted
+      elif raw_theme_tags == 'filler':
+        eligible = True
+      else:
+        eligible = tags_mask & group_mask
+
+      if not eligible:
+        continue
+
+      # Check mana curve
+      if not curve_tracker.fits(card_data['mv']):
+        continue
+
+      # Check statuses
+      if (restricted and lim_status['restricted']['count'] == lim_status['restricted']['max']) or any([card_data['status'][status] and lim_status[status]['count'] == lim_status[status]['max'] for status in card_data['status']]):
+        continue
+
+      #! Check limited tags
+
+      # Check hard costs and skip the card if there is no room for it anymore
+      increase_current_costs = of.match_hard_costs(card_data['colour_counts'],hard_costs_matchers,current_costs)
+      if not increase_current_costs:
+        continue
+
+      # The card is eligible and not ineligible, adjust the relevant counters
+
+      card_status = dict(card_data['status'], restricted=restricted)
+
+      if raw_theme_tags == 'filler':
+        filler_count += 1
+
+      for status in card_status:
+        if card_status[status]:
+          lim_status[status]['count'] += 1
+
+      #! Increase limited tags counters
+
+      for costs in increase_current_costs.keys():
+        if increase_current_costs[costs] == True:
+          current_costs[costs] += 1
+
+      # If a restricted card was included before a normal card, adjust the theme tags repartition
+      if raw_theme_tags == 'restricted':
+        for check_tags in theme_tags_numbers.keys():
+          # If the card has a tag the theme was looking for, decrease its associated number
+          if tags_mask & masks['groups'][check_tags]:
+            theme_tags_numbers[check_tags] -= 1
+            break
+          # If smart fill is on and the card does not match the current tags, increase their associated number as to not penalize them
+          elif smart_fill and check_tags != 'restricted':
+            theme_tags_numbers[check_tags] += 1
+
+      # Define the reason the card was added
+      reason = list_reason(card_data, raw_theme_tags)
+
+      # Add the card to the list
+      curve_tracker.add(card_data['mv'])
+      if verbose:
+        print(card_data['name'],': ',card_data['mana_costs'])
+      card_list.append(list_entry(card_data, reason, card_status))
+      added_names.add(name)
+
+      # Check if we need to continue
+      if not smart_fill:
+        current_number += 1
+      else:
+        current_number = len(card_list)
+
+      if current_number == theme_tags_numbers[raw_theme_tags] or len(card_list) == number_cards:
+        break
+
+    if len(card_list) == number_cards:
+      break
+
+  return {
+    "theme": inp_theme,
+    "cards": card_list,
+    "filler_count": filler_count,
+    "lim_status": lim_status,
+    "current_costs": current_costs,
+    "current_curve": curve_tracker.current_curve(),
+    "theme_tags": theme_tags_numbers
+  }
+
+# =================================================================== #
+# =================================================================== #
+#                           PRINT THE RESULTS                         #
+# =================================================================== #
+# =================================================================== #
+
+def print_recap(deck:str, config:dict, card_pile:dict, ranks:dict, theme_data:dict):
+  """
+  Prints a recap of the information about the card pile and the chosen theme.
+  """
+
+  inp_theme = theme_data['name']
+  curve = theme_data['curve']
+  hard_costs = theme_data['hard_costs']
+
+  console_message = "General information about the card pile and theme"
+  print("")
+  print(''.center(len(console_message)+11, '*'))
+  print(console_message.center(len(console_message)+10))
+  print(''.center(len(console_message)+11, '*'))
+  print("")
+
+  console_message = "Card pile characteristics"
+  print(console_message)
+  print(''.center(len(console_message), '='))
+  print("")
+
+  print("{:<35} {:<15}".format("Deck: ", deck))
+  print("{:<35} {:<15}".format("Number of cards in the pile: ", len(card_pile)))
+  print("{:<35} {:<15}".format("Number of cards of the list: ", theme_data['number_cards']))
+  print("{:<35} {:<15}".format("EDHrec rank median: ", ranks['median']))
+  print("{:<35} {:<15}".format("Popular rank limit: ", ranks['popular']))
+  print("{:<35} {:<15}".format("Unpopular rank limit: ", ranks['unpopular']))
+  print("{:<35} {:<15}".format("Automatic tagger: ", str(config['general'].get('auto_tagger', True))))
+  print("")
+
+  console_message = "Theme characteristics"
+  print(console_message)
+  print(''.center(len(console_message), '='))
+  print("")
+
+  print("{:<35} {:<15}".format("Chosen theme: ", inp_theme))
+  print("\nLimitations")
+  print(''.center(11, '-'))
+  print("")
+
+  if inp_theme != PILE_ANALYSIS:
+    print("Mana curve: \n")
+    for mv in sorted(curve.keys()):
+      if mv == min(curve.keys()):
+        print("{:<25}{:<10} {:<30}".format("MV %s or less: " % mv,curve[mv],''.center(curve[mv], '●')))
+      elif mv == max(curve.keys()):
+        print("{:<25}{:<10} {:<30}".format("MV %s or more: " % mv,curve[mv],''.center(curve[mv], '●')))
+      else:
+        print("{:<25}{:<10} {:<30}".format("MV %s: " % mv,curve[mv],''.center(curve[mv], '●')))
+
+  print("")
+  for status, maximum in theme_data['max_status'].items():
+      print("{:<35} {:<15}".format("Max number of %s cards: " % status, maximum))
+  print("\nHard costs limitations: ")
+  if hard_costs == {}:
+    print("- None")
+  else:
+    for costs,number in hard_costs.items():
+
+      patterns = costs.split(',')
+      patterns = [cost.strip() for cost in patterns if cost != '']
+
+      if len(patterns) == 1:
+        print("- %s cards with %s pattern" % (number,patterns[0]))
+      elif len(patterns) == 2:
+        print("- %s cards with %s or %s patterns" % (number,patterns[0],patterns[1]))
+      else:
+        print("- %s cards with %s, " % (number,patterns[0]), end="")
+        print(", ".join(patterns[1:-1]),end="")
+        print(" or %s patterns" % patterns[-1])
+
+  print("\nTags")
+  print(''.center(4, '-'))
+  print("")
+  print("{:<35} {:<15}".format("Smart fill: ", str(theme_data['smart_fill'])))
+  print("\nTags distribution: ")
+  if theme_data['tags'] == {}:
+    print("- None")
+  else:
+    for tags,number in theme_data['tags'].items():
+
+      theme_tags = tags.split(',')
+      theme_tags = [tag.strip().upper() for tag in theme_tags if tag != '']
+      if len(theme_tags) == 1:
+        print("- %s cards with %s" % (number,theme_tags[0]))
+      elif len(theme_tags) == 2:
+        print("- %s cards with %s or %s" % (number,theme_tags[0],theme_tags[1]))
+      else:
+        print("- %s cards with %s, " % (number,theme_tags[0]), end="")
+        print(", ".join(theme_tags[1:-1]),end="")
+        print(" or %s" % theme_tags[-1])
+
+#############################################################################################
+
+def print_results(results:dict, theme_data:dict, ranks:dict):
+  """
+  Prints the generated list, sorted by mana value, along with other information about it.
+  """
+
+  inp_theme = results['theme']
+  card_list = results['cards']
+  lim_status = results['lim_status']
+  curve = theme_data['curve']
+
+  console_message = "List of chosen cards for the theme %s" % inp_theme
+  print("")
+  print(''.center(len(console_message)+11, '*'))
+  print(console_message.center(len(console_message)+10))
+  print(''.center(len(console_message)+11, '*'))
+  print("")
+
+  column_sizes = "| {:^70} | {:^24} | {:^24} | {:^12} | {:^80} |"
+  table_width = 224
+  hrule = " " + ''.center(table_width, '-') + " "
+  print(hrule)
+  print(column_sizes.format("Name","Mana Cost","Reason","EDHrec Rank","Automatic TAGs (except keywords and characteristics)"))
+  print(hrule)
+
+  for mv in sorted(curve.keys()):
+
+    if mv == min(curve.keys()):
+      mv_list = [card for card in card_list if card["mv"] <= mv]
+      if len(mv_list) > 0:
+        print("\t%s cards at mana value %s or less:" % (len(mv_list),mv))
+    elif mv == max(curve.keys()):
+      mv_list = [card for card in card_list if card["mv"] >= mv]
+      if len(mv_list) > 0:
+        print("\t%s cards at mana value %s or more:" % (len(mv_list),mv))
+    else:
+      mv_list = [card for card in card_list if card["mv"] == mv]
+      if len(mv_list) > 0:
+        print("\t%s cards at mana value %s:" % (len(mv_list),mv))
+
+    if len(mv_list) > 0:
+      print(hrule)
+      for card in mv_list:
+
+        # Prepare the list of automatic tags that will be shown in the table
+        pr_tags_dict = {category:tags for category, tags in card['auto_tags'].items() if category not in ["keywords","characteristics"]}
+        pr_tags_list = list(itertools.chain(*list(pr_tags_dict.values()))) # Flatten the list of lists into a single list
+
+        # Print the table content
+        pr_tags_str = ", ".join([tag for tag in pr_tags_list if not tag.startswith((PREFIX_EXC,PREFIX_IGN,PREFIX_RES))])
+        pr_tags_str = (pr_tags_str[:75] + '(...)') if len(pr_tags_str) > 77 else pr_tags_str
+        print(column_sizes.format(card['name'], card['mana_costs'], card['reason'],card['rank'] if card['rank'] != float('inf') else " (ILLEGAL)", pr_tags_str))
+
+      print(hrule)
+
+  # Print other data about the list
+
+  console_message = "Other information about the list"
+  print(''.center(len(console_message)+11, '*'))
+  print(console_message.center(len(console_message)+10))
+  print(''.center(len(console_message)+11, '*'))
+  print("")
+
+  list_ranks = [card['rank'] for card in card_list]
+  list_median = int(statistics.median(list_ranks))
+
+  print("{:<35} {:<25}".format("EDHrec rank median: ", str(list_median) + " (%s average)" % ("above" if list_median < ranks['median'] else "below")))
+  for status in lim_status:
+    print("{:<35} {:<15}".format("Number of %s cards: " % status, lim_status[status]['count']))
+  print("{:<35} {:<15}".format("Number of filler cards: ", results['filler_count']))
+
+  print("\nHard costs repartition:\n")
+  for costs,number in results['current_costs'].items():
+
+    patterns = costs.split(',')
+    patterns = [cost.strip() for cost in patterns if cost != '']
+
+    if len(patterns) == 1:
+      print("- %s %s with %s pattern" % (number,"cards" if number > 1 else "card",patterns[0]))
+    elif len(patterns) == 2:
+      print("- %s %s with %s or %s patterns" % (number,"cards" if number > 1 else "card",patterns[0],patterns[1]))
+    else:
+      print("- %s %s with %s, " % (number,"cards" if number > 1 else "card",patterns[0]), end="")
+      print(", ".join(patterns[1:-1]),end="")
+      print(" or %s patterns" % patterns[-1])
+
+  all_tags = [tag for tags in [card['tags'] for card in card_list] for tag in tags]
+  print("\nTheme tags repartition:\n")
+  relevant_tags = [tag.strip() for tags in [tags.split(",") for tags in results['theme_tags'].keys() if tags != 'filler' and tags != 'restricted'] for tag in tags]
+  if relevant_tags == []:
+    print("- None")
+  else:
+    for tag in relevant_tags:
+      print("- %s %s with the %s tag" % (all_tags.count(tag),"cards" if all_tags.count(tag) > 1 else "card", tag.upper()))
+
+  print("\nGeneric tags repartition:\n")
+  generic_tags = ['ramp','draw','removal','sweeper']
+  for tag in generic_tags:
+    print("- %s %s with the %s tag" % (all_tags.count(tag),"cards" if all_tags.count(tag) > 1 else "card", tag.upper()))
+
+#############################################################################################
+
+def write_list(results:dict, filename:str):
+  """
+  Writes the generated list in a text file, in the format used by Moxfield.
+  """
+
+  with open(filename, 'w+', encoding='utf-8') as f:
+    for card in results['cards']:
+      f.write("1 %s\n" % card['name'])
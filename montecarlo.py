@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+########################################################################################################################################################
+##                                                 LIVING ANTHOLOGY DECKS MONTE CARLO THEME ANALYZER                                                  ##
+##                                                                                                                                                    ##
+##              Runs the list generation of main.py many times per theme, with different seeds, to find out which cards each theme picks.             ##
+##                                     /!\ In order to run, this script requires Python 3.7+ as well as YAML. /!\                                     ##
+########################################################################################################################################################
+
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import batch
+import generator as gen
+
+#############################################################################################
+
+def new_stats(theme_data:dict):
+  """
+  Initializes the statistics of the runs of a theme: number of runs (and of lists that could not be completed), number of times each card was chosen, and distributions of the number of filler cards, of the EDHrec rank median and of the fill of each mana value of the curve.
+  """
+
+  return {
+    'runs': 0,
+    'incomplete': 0,
+    'cards': Counter(),
+    'filler': Counter(),
+    'rank_median': [],
+    'curve': {mv:Counter() for mv in theme_data['curve']}
+  }
+
+#############################################################################################
+
+def run_chunk(theme_data:dict, seeds:range):
+  """
+  Generates the list of a theme once per seed (see batch.run_theme) and gathers the statistics of those runs.
+  Only the counters of each run are kept, so that the chunk is cheap to send back to the main process.
+  """
+
+  stats = new_stats(theme_data)
+
+  for seed in seeds:
+
+    results = batch.run_theme(theme_data, seed)
+
+    stats['runs'] += 1
+    if len(results['cards']) < theme_data['number_cards']:
+      stats['incomplete'] += 1
+    stats['cards'].update(card['name'] for card in results['cards'])
+    stats['filler'][results['filler_count']] += 1
+    if results['cards']:
+      stats['rank_median'].append(statistics.median(card['rank'] for card in results['cards']))
+    for mv, count in results['current_curve'].items():
+      stats['curve'][mv][count] += 1
+
+  return stats
+
+#############################################################################################
+
+def merge_stats(stats:dict, chunk_stats:dict):
+  """
+  Adds the statistics of a chunk of runs to the statistics of the theme.
+  """
+
+  stats['runs'] += chunk_stats['runs']
+  stats['incomplete'] += chunk_stats['incomplete']
+  stats['cards'].update(chunk_stats['cards'])
+  stats['filler'].update(chunk_stats['filler'])
+  stats['rank_median'] += chunk_stats['rank_median']
+  for mv, counts in chunk_stats['curve'].items():
+    stats['curve'][mv].update(counts)
+
+#############################################################################################
+
+def distribution(counts:Counter):
+  """
+  Summarizes a distribution given as {value: number of runs}: minimum, mean, median and maximum.
+  """
+
+  values = sorted(counts.elements())
+
+  return "min %s, mean %.2f, median %s, max %s" % (values[0], statistics.mean(values), statistics.median(values), values[-1])
+
+#############################################################################################
+
+def print_report(theme_data:dict, stats:dict, card_names:list, first_seed:int):
+  """
+  Prints the Monte Carlo report of a theme: the probability of each card to be chosen and the distributions of the counters of the lists.
+  """
+
+  runs = stats['runs']
+  curve = theme_data['curve']
+
+  console_message = "Monte Carlo analysis of the theme %s" % theme_data['name']
+  print("")
+  print(''.center(len(console_message)+11, '*'))
+  print(console_message.center(len(console_message)+10))
+  print(''.center(len(console_message)+11, '*'))
+  print("")
+
+  print("{:<35} {:<15}".format("Number of runs: ", runs))
+  print("{:<35} {:<15}".format("Seeds: ", "%s to %s" % (first_seed, first_seed + runs - 1)))
+  print("{:<35} {:<15}".format("Incomplete lists: ", stats['incomplete']))
+  print("{:<35} {}".format("Number of filler cards: ", distribution(stats['filler'])))
+  if stats['rank_median']:
+    rank_medians = sorted(stats['rank_median'])
+    print("{:<35} {}".format("EDHrec rank median: ", "min %s, mean %.2f, median %s, max %s" % (rank_medians[0], statistics.mean(rank_medians), statistics.median(rank_medians), rank_medians[-1])))
+
+  print("\nMana curve fill:\n")
+  for mv in sorted(curve.keys()):
+    if mv == min(curve.keys()):
+      label = "MV %s or less: " % mv
+    elif mv == max(curve.keys()):
+      label = "MV %s or more: " % mv
+    else:
+      label = "MV %s: " % mv
+    full = sum(number for count, number in stats['curve'][mv].items() if count >= curve[mv])
+    print("{:<25}{:<55} {:>6.1%} full".format(label, distribution(stats['curve'][mv]) + " / %s" % curve[mv], full / runs))
+
+  print("\nInclusion probability:\n")
+  column_sizes = "| {:^70} | {:^12} |"
+  hrule = " " + ''.center(89, '-') + " "
+  print(hrule)
+  print(column_sizes.format("Name","Probability"))
+  print(hrule)
+  for name, count in sorted(stats['cards'].items(), key=lambda item: (-item[1], item[0])):
+    print("| {:<70} | {:>12.2%} |".format(name, count / runs))
+  print(hrule)
+
+  never_chosen = [name for name in card_names if name not in stats['cards']]
+  print("\n%s %s never chosen%s" % (len(never_chosen), "cards were" if len(never_chosen) > 1 else "card was", ": " + ", ".join(sorted(never_chosen)) if never_chosen else ""))
+
+#############################################################################################
+
+def main():
+
+  parser = argparse.ArgumentParser(description="Runs the list generation of several themes many times with different seeds and reports the probability of each card to be chosen.")
+  parser.add_argument("-c", "--config", default="dragons.yml", help="YAML configuration file of the deck (default: %(default)s)")
+  parser.add_argument("-t", "--themes", nargs="+", help="Themes to analyze, \"%s\" included (default: all the themes of the configuration file)" % gen.NO_THEME)
+  parser.add_argument("-n", "--runs", type=int, default=10000, help="Number of runs per theme (default: %(default)s)")
+  parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the first run, the next runs using the following seeds (default: %(default)s)")
+  parser.add_argument("-p", "--processes", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+  parser.add_argument("--chunk-size", type=int, default=250, help="Number of runs sent at once to a worker process (default: %(default)s)")
+  args = parser.parse_args()
+
+  if args.runs < 1:
+    parser.error("the number of runs must be at least 1")
+  if args.chunk_size < 1:
+    parser.error("the chunk size must be at least 1")
+
+  start = time.time()
+
+  config = gen.load_config(args.config)
+  themes = batch.select_themes(parser, config, args.themes)
+
+  if gen.PILE_ANALYSIS in themes:
+    parser.error("the pile analysis lists all the cards of the pile, there is nothing to analyze")
+
+  # Load the pile, its data and its tags once for all the themes
+
+  try:
+    card_pile, themes_data, cards = batch.load_deck(config, themes)
+  except ValueError as error:
+    print(error)
+    exit(1)
+
+  # Split the runs of each theme in chunks and spread them over the worker processes
+
+  chunks = [(index, range(first, min(first + args.chunk_size, args.seed + args.runs)))
+            for index in range(len(themes_data))
+            for first in range(args.seed, args.seed + args.runs, args.chunk_size)]
+
+  themes_stats = [new_stats(theme_data) for theme_data in themes_data]
+
+  with ProcessPoolExecutor(max_workers=args.processes or os.cpu_count(), initializer=batch.init_worker, initargs=(cards, list(card_pile))) as executor:
+    chunks_stats = executor.map(run_chunk, [themes_data[index] for index, seeds in chunks], [seeds for index, seeds in chunks])
+    for (index, seeds), chunk_stats in zip(chunks, chunks_stats):
+      merge_stats(themes_stats[index], chunk_stats)
+
+  for theme_data, stats in zip(themes_data, themes_stats):
+    print_report(theme_data, stats, list(card_pile), args.seed)
+
+  print("\nTotal execution time: %.2f s" % (time.time() - start))
+
+# =================================================================== #
+# =================================================================== #
+#                          CALL MAIN FUNCTION                         #
+# =================================================================== #
+# =================================================================== #
+
+if __name__ == "__main__":
+  main()
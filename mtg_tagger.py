@@ -7,17 +7,102 @@
 #!                                  information from a given source file and launches the corresponding jobs on the cluster.                          ##
 #!                                      Extended documentation is available at https://chains-ulb.readthedocs.io/                                     ##
 ##                                                                                                                                                    ##
-##                                   /!\ In order to run, this script requires Python 3.5+ as well as Scrython. /!\                                   ##
+##                                             /!\ In order to run, this script requires Python 3.7+. /!\                                             ##
 ########################################################################################################################################################
 
+import argparse
+import functools
 import os
 import re
 import shutil
-import time
-
-import scrython
 
 import other_functions as of
+import scryfall_api
+from card_lookup import DATA_FILES, CardLookup
+
+# =================================================================== #
+# =================================================================== #
+#                        DEFINE TAGGING RULES                         #
+# =================================================================== #
+# =================================================================== #
+
+def compile_rule(pattern:str):
+  """
+  Compiles a case-insensitive tagging pattern, taking into account the possibility of extra spaces between words.
+  """
+
+  return re.compile(pattern.replace(" ",r"\s+"), re.IGNORECASE)
+
+# Patterns that do not depend on the card, compiled once at import. Patterns built from the names or subtypes of the card are compiled on the fly by search_oracle.
+
+RULE_PATTERNS = {
+
+  # Triggers
+
+  'attack': r"when(?:ever)? [^\.]* attacks?",
+  'attack_you': r"when(?:ever)? [^\.]* attacks? you",
+  'block': r"when(?:ever)? [^\.]* blocks?\b",
+  'self_cast_creature': r"when(?:ever)? this creature[^\.]* enters?\s*[\w\s]*, (?:if you cast it|if it was kicked|if its \w+ cost was paid)",
+  'self_cast_spell': r"when(?:ever)? you cast this spell",
+  'cast_all': r"when(?:ever)? you cast a spell",
+  'cast_types': r"when(?:ever)? you cast an? (?P<card_types>[^\.]*) spell",
+  'combat': r"at the beginning of combat",
+  'death': r"when(?:ever)? (?![^\.]*six-sided)[^\.]* dies?", # (?![^\.]*six-sided) to avoid Uncards with six-sided die
+  'death_other': r"when(?:ever)? [^\.]*(?:opponent|dealt (?:combat )*damage)+[^\.]* dies?",
+  'end_step': r"at the beginning of (?:the|your|each(?: player's)?) end step",
+  'etb': r"when(?:ever)? this creature[^\.]* enters?\s*(?![^\.]*(?:if you cast it|if it was kicked|if its \w+ cost was paid))",
+  'other_etb': r"when(?:ever)? [^\.]*another [^\.]* enters?\s*(?![^\.]*(?:if you cast it|if it was kicked|if its \w+ cost was paid))",
+  'landfall': r"when(?:ever)? [^\.]* lands? enters?\s*(?! under an opponent's control)",
+  'saboteur': r"when(?:ever)? [^\.]* deals? (?:combat )?damage to an? (?:player|opponent)",
+  'upkeep': r"at the beginning of (?:your|each(?: player's)?) upkeep",
+
+  # Costs
+
+  'mana_sink_ability': r"(?:\{[WUBRGCX0-9]+\})+[^\.]*:",
+  'mana_sink_pay': r"you (?:may )?pay (?:\{[WUBRGCX0-9]+\})+",
+  'tap': r'{T}',
+
+  # Effects
+
+  'burn_creature': r"deals? [^\.,]*damage (?!to target (?:player|opponent))(?:equal to [^\.,]*)?(?:to any target|to [^\.,]* creature|divided as you choose among [^\.,]* (?:targets|[^\.,]* creature))",
+  'burn_both': r"deals? [^\.,]*damage to (?:each|target|the|that) (?:player|opponent)(?: or planeswalker)? and (?:each [^\.,]*creature|[^\.,]* damage to [^\.,]*creature)",
+  'faceburn': r"deals? [^\\.,]*damage(?: equal to [^\\.]*)? to (?:each|target|the|that|its)(?: other)? (?:player|opponent|controller)",
+  'coin_flip': r"flips? \w+ coins?",
+  'counters_distribute': r"distributes? [^\.]* counters? among any number of target ",
+  'other_counters_put': r"puts? [^\.]* counters? on (?:it|each|(?:up to one(?: other)? )?target|another|a |that)",
+  'self_counters_put': r"puts? [^\.]* counters? on (?:this creature|each creature|each permanent)",
+  'other_counters_distribute': r"distributes? [^\.]* counters? among",
+  'draw': r"(?!opponent )[dD]raws?\s*\w*\s*(\w*\s*)?cards?(?:\.| for| equal| and)",
+  'die_roll_dx': r"rolls? \w+ d\d+",
+  'die_roll_six': r"rolls? \w+ six-sided dic?e",
+  'extra_combat': r"additional combat phase",
+  'initiative': r"you take the initiative",
+  'looter': r"(?!opponent )draws? [^\.]* then discards?", # Also excludes the Draw tag
+  'monarch': r"you become the monarch",
+  'reanimate_types': r"(?:put|return) (?P<card_types>[^\.]*) cards? [^\.,]*from[^\.,]* graveyards? (?:onto|to) the battlefield",
+  'self_reanimate': r"return this card from your graveyard to the battlefield",
+  'recast_all': r"you may(?: play lands and)? cast (?:cards?|spells?) from your graveyard",
+  'recast_types': r"you may(?: play a land and)? cast (?P<card_types>[^\.]*) (?:cards?|spells?)[^\.]* from your graveyard",
+  'recursion_all': r"return (?:all|[^\.]*target) cards? from your graveyard to your hand",
+  'recursion_types': r"return (?P<card_types>[^\.]*) cards? from your graveyard to your hand",
+  'uncounterable': r"this spell can't be countered",
+  'wheel': r"(?!opponent )discards? (?:your hand|their hand|any number of cards)[^\.]* (?:and|then) draws?", # Also excludes the Draw tag
+
+}
+
+RULES = {rule: compile_rule(pattern) for rule, pattern in RULE_PATTERNS.items()}
+
+REGEX_SPECIAL = frozenset(".^$*+?{}[]\\|()")
+REMINDER_TEXT = re.compile(r'\([^()]*\)')
+SUBTYPES = re.compile(r'—\s*(.*)')
+
+# Scryfall fields read by the tagger (the tags of a card can only change if one of those fields changes)
+
+TAGGED_FIELDS = ('name','type_line','oracle_text','mana_cost','colors','keywords','power','toughness','set','card_faces','all_parts')
+
+# Categories of tags, in the order they are computed
+
+CATEGORIES = ('keywords','characteristics','triggers','costs','effects')
 
 # =================================================================== #
 # =================================================================== #
@@ -25,7 +110,7 @@ import other_functions as of
 # =================================================================== #
 # =================================================================== #
 
-def automatic_tags(card:dict, catalogs_list:list):
+def automatic_tags(card:dict, context:"TaggerContext", categories:tuple=CATEGORIES):
   """
   Automatically define tags for the card based on Scryfall data by calling other functions for each category of tags.
   Supported categories:
@@ -34,10 +119,25 @@ def automatic_tags(card:dict, catalogs_list:list):
     - Triggers of the card (conditions for the triggered abilities of the card to trigger)
     - Costs of the card (additional costs to use the abilities of the card) 
     - Effects of the card (what the abilities of the card do, rather than how they can be activated/triggered)
+  The catalogs and options of the tagger are given by the context (see TaggerContext).
+  Only the given categories are computed (all of them by default), the rules text being left alone if none of them needs it.
   """
 
   auto_tags = {}
 
+  # Keywords of the card (as given by Scryfall)
+
+  if 'keywords' in categories:
+    auto_tags['keywords'] = [keyword.lower() for keyword in card['keywords']]
+
+  # Characteristics of the card (anything outside the rules text and the name)
+
+  if 'characteristics' in categories:
+    auto_tags['characteristics'] = charac_tags(card)
+
+  if not any(category in categories for category in ('triggers','costs','effects')):
+    return auto_tags
+
   # ================
   # Preparation step
   # ================
@@ -66,38 +166,57 @@ def automatic_tags(card:dict, catalogs_list:list):
 
   # Remove reminder text from oracle text
 
-  oracle_text = re.sub(r'\([^()]*\)', '', oracle_text)
+  oracle_text = REMINDER_TEXT.sub('', oracle_text)
+  oracle = OracleText(oracle_text)
 
-  # Declare catalogs argument as a global variable
+  # Only the names found in the oracle text can match the patterns built from them, so the other names are left out before any of those patterns is compiled
 
-  global catalogs
-  catalogs = catalogs_list
+  names = [name for name in names if oracle.mentions(name)]
 
   # ========
   # Get TAGs
   # ========
 
-  # Keywords of the card (as given by Scryfall)
-
-  auto_tags['keywords'] = [keyword.lower() for keyword in card['keywords']]
-
-  # Characteristics of the card (anything outside the rules text and the name)
-
-  auto_tags['characteristics'] = charac_tags(card)
-
   # Triggers of the card (conditions for the triggered abilities of the card to trigger)
 
-  auto_tags['triggers'] = triggers_tags(card,names,oracle_text)
+  if 'triggers' in categories:
+    auto_tags['triggers'] = triggers_tags(card,names,oracle,context)
 
   # Costs of the card (additional costs to use the abilities of the card)
 
-  auto_tags['costs'] = costs_tags(card,names,oracle_text)
+  if 'costs' in categories:
+    auto_tags['costs'] = costs_tags(card,names,oracle,context)
 
   # Effects of the card (what the abilities of the card do, rather than how they can be activated/triggered)
 
-  auto_tags['effects'] = effects_tags(card,names,oracle_text)
+  if 'effects' in categories:
+    auto_tags['effects'] = effects_tags(card,names,oracle,context)
 
   return auto_tags
+
+#############################################################################################
+
+def automatic_tags_many(cards, context:"TaggerContext", categories:list=None):
+  """
+  Batch version of automatic_tags: tags each card of an iterable of Scryfall cards and yields (card id, automatic tags) pairs as they are computed.
+  The context (catalogs and compiled rules) is shared by the whole batch, and a card appearing several times in the batch is only tagged once.
+  Only the given categories are computed (all of them by default, see CATEGORIES).
+  """
+
+  if categories is None:
+    categories = CATEGORIES
+  else:
+    unknown = [category for category in categories if category not in CATEGORIES]
+    if unknown:
+      raise ValueError("Unknown categories of tags: %s (supported categories: %s)" % (", ".join(unknown), ", ".join(CATEGORIES)))
+    categories = tuple(category for category in CATEGORIES if category in categories)
+
+  tagged = {}
+
+  for card in cards:
+    if card['id'] not in tagged:
+      tagged[card['id']] = automatic_tags(card, context, categories)
+    yield card['id'], {category: list(tags) for category, tags in tagged[card['id']].items()}
    
 #############################################################################################
 
@@ -141,22 +260,85 @@ def name_shortener(name:str):
 
 def search_oracle(pattern:str,text:str):
   """
-  Searches the text for a specific case-insensitive pattern and return True/False depending on whether the pattern is found or not.
+  Searches the text for a specific case-insensitive pattern and returns the match object (or None if the pattern is not found).
   Also takes into account the possiblity of extra spaces between words.
+  Meant for patterns built from the card itself (names, subtypes), the fixed patterns being searched through OracleText.
   """
 
-  result = re.compile(pattern.replace(" ","\s+"), re.IGNORECASE).search(text)
+  result = _compile_card_rule(pattern).search(text)
   return result
 
+@functools.lru_cache(maxsize=1024)
+def _compile_card_rule(pattern:str):
+  return compile_rule(pattern)
+
+#############################################################################################
+
+class OracleText:
+  """
+  Oracle text of a card, remembering the match object of each rule of the RULES table already searched in it, so that each rule runs at most once per card.
+  """
+
+  def __init__(self, text:str):
+    self.text = text
+    self.matches = {}
+    self.folded = " ".join(text.split()).casefold()
+
+  def mentions(self, name:str):
+    """
+    Returns whether the name of the card may appear in the oracle text, in which case the patterns built from it have to be searched.
+    Only the ASCII names without regex special characters are looked for as plain text, the other ones being always considered as mentioned.
+    """
+
+    if not name.isascii() or REGEX_SPECIAL.intersection(name):
+      return True
+    return " ".join(name.split()).casefold() in self.folded
+
+  def search(self, rule:str):
+    """
+    Returns the match object of the given rule (or None if the rule is not found in the oracle text).
+    """
+
+    if rule not in self.matches:
+      self.matches[rule] = RULES[rule].search(self.text)
+    return self.matches[rule]
+
 #############################################################################################
 
-def sort_captured(captured_words:str):
+class CatalogIndex:
+  """
+  Card types and subtypes of the Scryfall catalogs, hashed for constant time lookups.
+  A word is considered as a type if it is in the catalogs, either as is or without its "non" prefix (e.g. "noncreature").
+  The "non" forms are precomputed, each word mapping to the type it refers to, so that a word is checked with a single lookup.
+  """
+
+  def __init__(self, catalogs_list:list):
+    self.types = frozenset(type.lower() for type in catalogs_list)
+    self.words = {"non" + type: type for type in self.types}
+    self.words.update((type, type) for type in self.types)
+
+  def __contains__(self, word:str):
+    return word in self.words
+
+#############################################################################################
+
+class TaggerContext:
+  """
+  Data shared by the tagging of all the cards, given explicitly to automatic_tags so that the tagger holds no global state and can run from several threads at once.
+  """
+
+  def __init__(self, catalogs_list:list):
+    self.catalogs = CatalogIndex(catalogs_list)
+
+#############################################################################################
+
+def sort_captured(captured_words:str,catalogs:CatalogIndex):
   """
   Sort words captured through a regex, trying to identify the mentioned card types and subtypes.
   """
 
   split_words = re.split(r",| ", captured_words)
-  types_list = [word.lower() for word in split_words if word.lower() in catalogs or (word.lower()).lstrip("non") in catalogs]
+  types_list = [word.lower() for word in split_words if word.lower() in catalogs]
 
   return types_list
 
@@ -248,7 +430,7 @@ def charac_tags(card:dict):
 
 #############################################################################################
 
-def triggers_tags(card:dict,names:list,oracle_text:str):
+def triggers_tags(card:dict,names:list,oracle:OracleText,context:TaggerContext):
   """
   Automatically define "Triggers" tags for the card based on Scryfall data, its name(s) and its oracle text(s).
   "Triggers" tags refer to conditions for the triggered abilities of the card to trigger.
@@ -269,109 +451,93 @@ def triggers_tags(card:dict,names:list,oracle_text:str):
 
   # Attack
 
-  pattern1 = r"when(?:ever)? [^\.]* attacks?"
-  pattern2 = r"when(?:ever)? [^\.]* attacks? you"
-  if search_oracle(pattern1,oracle_text) and not search_oracle(pattern2,oracle_text):
+  if oracle.search('attack') and not oracle.search('attack_you'):
     tags.append('attack')
 
   # Block
 
-  pattern = r"when(?:ever)? [^\.]* blocks?\b"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('block'):
     tags.append('block')
 
   # Cast and self_cast
   
   for name in names:
     pattern = r"when(?:ever)? " + name + r"[^\.]* enters?\s*[\w\s]*, (?:if you cast it|if it was kicked|if its \w+ cost was paid)" # Legacy pattern (cards do not refer to themselves by name anymore)
-    if search_oracle(pattern,oracle_text):
+    if search_oracle(pattern,oracle.text):
       tags.append('self_cast')
       break
   
-  pattern = r"when(?:ever)? this creature[^\.]* enters?\s*[\w\s]*, (?:if you cast it|if it was kicked|if its \w+ cost was paid)"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('self_cast_creature'):
     tags.append('self_cast')
 
-  pattern = r"when(?:ever)? you cast this spell"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('self_cast_spell'):
     tags.append('self_cast')
 
-  pattern = r"when(?:ever)? you cast a spell"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('cast_all'):
     tags.append('cast_all')
 
-  pattern = r"when(?:ever)? you cast an? (?P<card_types>[^\.]*) spell"
-  if search_oracle(pattern,oracle_text):
-    types_list = sort_captured(search_oracle(pattern,oracle_text).group("card_types"))
+  match = oracle.search('cast_types')
+  if match:
+    types_list = sort_captured(match.group("card_types"),context.catalogs)
     for word in types_list:
       tags.append('cast_' + word)
 
   # Combat
 
-  pattern = r"at the beginning of combat"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('combat'):
     tags.append('combat')
 
   # Death
 
-  pattern1 = r"when(?:ever)? (?![^\.]*six-sided)[^\.]* dies?" # (?![^\.]*six-sided) to avoid Uncards with six-sided die
-  pattern2 = r"when(?:ever)? [^\.]*(?:opponent|dealt (?:combat )*damage)+[^\.]* dies?"
-  if search_oracle(pattern1,oracle_text) and not search_oracle(pattern2,oracle_text):
+  if oracle.search('death') and not oracle.search('death_other'):
     tags.append('death')  
 
   # End_step
 
-  pattern = r"at the beginning of (?:the|your|each(?: player's)?) end step"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('end_step'):
     tags.append('end_step')
 
   # ETB and other_ETB
 
   for name in names:
     pattern = r"when(?:ever)? " + name + r"[^\.]* enters?\s*(?![^\.]*(?:if you cast it|if it was kicked|if its \w+ cost was paid))"  # Legacy pattern (cards do not refer to themselves by name anymore)
-    if search_oracle(pattern,oracle_text):
+    if search_oracle(pattern,oracle.text):
       tags.append('etb')
       break
 
-  pattern = r"when(?:ever)? this creature[^\.]* enters?\s*(?![^\.]*(?:if you cast it|if it was kicked|if its \w+ cost was paid))"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('etb'):
     tags.append('etb')
 
   if "etb" not in tags and "all_parts" in card:
     for part in card['all_parts']:
       if part['component'] == 'token': # For cards that create tokens with ETB
-        pattern = r"when(?:ever)? this creature[^\.]* enters?\s*(?![^\.]*(?:if you cast it|if it was kicked|if its \w+ cost was paid))"
-        if search_oracle(pattern,oracle_text):
+        if oracle.search('etb'):
           tags.append('etb')
           break
 
-  pattern = r"when(?:ever)? [^\.]*another [^\.]* enters?\s*(?![^\.]*(?:if you cast it|if it was kicked|if its \w+ cost was paid))"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('other_etb'):
     tags.append('other_etb')
 
   # Landfall
 
-  pattern = r"when(?:ever)? [^\.]* lands? enters?\s*(?! under an opponent's control)"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('landfall'):
     tags.append('landfall')
 
   # Saboteur
 
-  pattern = r"when(?:ever)? [^\.]* deals? (?:combat )?damage to an? (?:player|opponent)"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('saboteur'):
     tags.append('saboteur')
 
   # Upkeep
 
-  pattern = r"at the beginning of (?:your|each(?: player's)?) upkeep"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('upkeep'):
     tags.append('upkeep')
 
   return tags
 
 #############################################################################################
 
-def costs_tags(card:dict,names:list,oracle_text:str):
+def costs_tags(card:dict,names:list,oracle:OracleText,context:TaggerContext):
   """
   Automatically define "Costs" tags for the card based on Scryfall data, its name(s) and its oracle text(s).
   "Costs" tags refer to additional costs that must be paid in order to use the abilities of the card.
@@ -384,22 +550,19 @@ def costs_tags(card:dict,names:list,oracle_text:str):
 
   # Mana Sink
 
-  pattern1 = r"(?:\{[WUBRGCX0-9]+\})+[^\.]*:"
-  pattern2 = r"you (?:may )?pay (?:\{[WUBRGCX0-9]+\})+"
-  if search_oracle(pattern1,oracle_text) or search_oracle(pattern2,oracle_text):
+  if oracle.search('mana_sink_ability') or oracle.search('mana_sink_pay'):
     tags.append('mana_sink') 
 
   # Tap
 
-  pattern = r'{T}'
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('tap'):
     tags.append('tap') 
 
   return tags
 
 #############################################################################################
 
-def effects_tags(card:dict,names:list,oracle_text:str):
+def effects_tags(card:dict,names:list,oracle:OracleText,context:TaggerContext):
   """
   Automatically define "Effects" tags for the card based on Scryfall data, its name(s) and its oracle text(s).
   "Effects" tags refer to what the abilities of the card do, rather than how they can be activated/triggered.
@@ -425,127 +588,112 @@ def effects_tags(card:dict,names:list,oracle_text:str):
 
   # Burn and Faceburn
 
-  pattern1 = r"deals? [^\.,]*damage (?!to target (?:player|opponent))(?:equal to [^\.,]*)?(?:to any target|to [^\.,]* creature|divided as you choose among [^\.,]* (?:targets|[^\.,]* creature))"
-  pattern2 = r"deals? [^\.,]*damage to (?:each|target|the|that) (?:player|opponent)(?: or planeswalker)? and (?:each [^\.,]*creature|[^\.,]* damage to [^\.,]*creature)"
-  if search_oracle(pattern1,oracle_text) or search_oracle(pattern2,oracle_text):
+  if oracle.search('burn_creature') or oracle.search('burn_both'):
     tags.append('burn')
 
-  pattern = r"deals? [^\\.,]*damage(?: equal to [^\\.]*)? to (?:each|target|the|that|its)(?: other)? (?:player|opponent|controller)"
-  if search_oracle(pattern,oracle_text) and 'burn' not in tags:
+  if oracle.search('faceburn') and 'burn' not in tags:
     tags.append('faceburn')
 
   # Coin_flip
 
-  pattern = r"flips? \w+ coins?"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('coin_flip'):
     tags.append('coin_flip')
 
   # Counters and other_Counters
 
-  patterns = []
-  for name in names:
-    patterns.append(r"puts? [^\.]* counters? on (?:" + name + r"|this creature|each creature|each permanent)")
-    patterns.append(name + r" enters? with [^\.]* counters? on it")
-    patterns.append(r"distributes? [^\.]* counters? among any number of target ")
-    if any([search_oracle(pattern,oracle_text) for pattern in patterns]):
-      tags.append('counters')
-      break
-
-  pattern1 = r"puts? [^\.]* counters? on (?:it|each|(?:up to one(?: other)? )?target|another|a |that)"
-  pattern2 = r"distributes? [^\.]* counters? among"
-  if search_oracle(pattern1,oracle_text) or search_oracle(pattern2,oracle_text):
+  if oracle.search('counters_distribute') or oracle.search('self_counters_put'):
+    tags.append('counters')
+  else:
+    for name in names:
+      patterns = [
+        r"puts? [^\.]* counters? on " + name,
+        name + r" enters? with [^\.]* counters? on it"
+      ]
+      if any([search_oracle(pattern,oracle.text) for pattern in patterns]):
+        tags.append('counters')
+        break
+
+  if oracle.search('other_counters_put') or oracle.search('other_counters_distribute'):
     tags.append('other_counters')
 
   # Draw
 
-  pattern1 = r"(?!opponent )[dD]raws?\s*\w*\s*(\w*\s*)?cards?(?:\.| for| equal| and)"
-  pattern2 = r"(?!opponent )[dD]raws? [^\.]* then discards?" # Looter tag insted
-  pattern3 = r"(?!opponent )discards? (?:your hand|their hand|any number of cards)[^\.]* (?:and|then) draws?" # Wheel tag instead
-  if search_oracle(pattern1,oracle_text) and not search_oracle(pattern2,oracle_text) and not search_oracle(pattern3,oracle_text):
+  if oracle.search('draw') and not oracle.search('looter') and not oracle.search('wheel'):
     tags.append('draw')
 
   # Die_roll
 
-  pattern1 = r"rolls? \w+ d\d+"
-  pattern2 = r"rolls? \w+ six-sided dic?e"
-  if search_oracle(pattern1,oracle_text) or search_oracle(pattern2,oracle_text):
+  if oracle.search('die_roll_dx') or oracle.search('die_roll_six'):
     tags.append('die_roll')
 
   # Extra Combat
 
-  pattern = r"additional combat phase"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('extra_combat'):
     tags.append('extra_combat')
 
   # Initiative
 
-  pattern = r"you take the initiative"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('initiative'):
     tags.append('initiative')
 
   # Looter
 
-  pattern = r"(?!opponent )draws? [^\.]* then discards?"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('looter'):
     tags.append('looter')
 
   # Monarch
 
-  pattern = r"you become the monarch"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('monarch'):
     tags.append('monarch')
 
   # Reanimate and self_reanimate
 
-  pattern = r"(?:put|return) (?P<card_types>[^\.]*) cards? [^\.,]*from[^\.,]* graveyards? (?:onto|to) the battlefield"
-  if search_oracle(pattern,oracle_text):
-    types_list = sort_captured(search_oracle(pattern,oracle_text).group("card_types"))
+  match = oracle.search('reanimate_types')
+  if match:
+    types_list = sort_captured(match.group("card_types"),context.catalogs)
     for word in types_list:
       tags.append('reanimate_' + word)
 
-  pattern = r"return this card from your graveyard to the battlefield"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('self_reanimate'):
     tags.append('self_reanimate')  
 
   for name in names:
     pattern = r"return " + name + r" from your graveyard to the battlefield"
-    if search_oracle(pattern,oracle_text):
+    if search_oracle(pattern,oracle.text):
       tags.append('self_reanimate')
       break
 
   # Recast and self_recast
 
-  pattern = r"you may(?: play lands and)? cast (?:cards?|spells?) from your graveyard"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('recast_all'):
       tags.append('recast_all')
 
-  pattern = r"you may(?: play a land and)? cast (?P<card_types>[^\.]*) (?:cards?|spells?)[^\.]* from your graveyard"
-  if search_oracle(pattern,oracle_text):
-    types_list = sort_captured(search_oracle(pattern,oracle_text).group("card_types"))
+  match = oracle.search('recast_types')
+  if match:
+    types_list = sort_captured(match.group("card_types"),context.catalogs)
     for word in types_list:
       tags.append('recast_' + word)
 
   for name in names:
     pattern = r"cast " + name + r" from your graveyard(?! (?:onto|to) the battlefield)"
-    if search_oracle(pattern,oracle_text):
+    if search_oracle(pattern,oracle.text):
       tags.append('self_recast')
       break
   
   # Recursion and self_recursion
 
-  pattern = r"return (?:all|[^\.]*target) cards? from your graveyard to your hand"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('recursion_all'):
       tags.append('recursion_all')
 
-  pattern = r"return (?P<card_types>[^\.]*) cards? from your graveyard to your hand"
-  if search_oracle(pattern,oracle_text):
-    types_list = sort_captured(search_oracle(pattern,oracle_text).group("card_types"))
+  match = oracle.search('recursion_types')
+  if match:
+    types_list = sort_captured(match.group("card_types"),context.catalogs)
     for word in types_list:
       tags.append('recursion_' + word)
 
   for name in names:
     pattern = r"return " + name + r" from your graveyard to your hand"
-    if search_oracle(pattern,oracle_text):
+    if search_oracle(pattern,oracle.text):
       tags.append('self_recursion')
       break
 
@@ -561,7 +709,7 @@ def effects_tags(card:dict,names:list,oracle_text:str):
 
   # Tribal
 
-  match = re.search(r'—\s*(.*)', card['type_line']) # Extraire les subtypes après le "—"
+  match = SUBTYPES.search(card['type_line']) # Extraire les subtypes après le "—"
   if match:
     subtypes = match.group(1).split()  # ['Dragon', 'God']
 
@@ -570,30 +718,30 @@ def effects_tags(card:dict,names:list,oracle_text:str):
         pattern1 = rf'(?<!non-){subtype}(?:s? you control|( permanent| creature)? cards?|( permanent| creature)? spells?)'
         pattern2 = rf'one or more {subtype}s?'
         
-        if search_oracle(pattern1,oracle_text) or search_oracle(pattern2,oracle_text):
+        if search_oracle(pattern1,oracle.text) or search_oracle(pattern2,oracle.text):
             tags.append("tribal_" + subtype.lower())
 
   # Uncounterable
 
-  pattern = r"this spell can't be countered"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('uncounterable'):
     tags.append('uncounterable')
 
   # Wheel
 
-  pattern = r"(?!opponent )discards? (?:your hand|their hand|any number of cards)[^\.]* (?:and|then) draws?"
-  if search_oracle(pattern,oracle_text):
+  if oracle.search('wheel'):
     tags.append('wheel')
 
   return tags
 
+#############################################################################################
+
 # =================================================================== #
 # =================================================================== #
 #                         DEFINE MAIN FUNCTION                        #
 # =================================================================== #
 # =================================================================== #
 
-def main(): 
+def main(data_files:list=None): 
 
   # Load Scryfall catalogs
 
@@ -605,38 +753,10 @@ def main():
   with open(catalog_file, 'r') as f:
     catalogs = f.read().splitlines()
 
-  # Fetch card data
+  # The catalogs, the tagging rules and the card index are prepared once for all the cards checked during the session
 
-  print("\nWhich MTG card would you like to check tags for?")
-
-  def fetch_data():
-
-    inp_name = input("Enter a card name then press ENTER: ")
-    print("")
-
-    try:
-
-      print("{:20}".format("Fetching data ..."), end ="")
-      search = scrython.cards.Search(q='!"%s" include:extras -is:reprint' % inp_name)
-      card_data = search.data()[0]
-      time.sleep(0.5)
-      print("[DONE]")
-      return card_data
-
-    except scrython.foundation.ScryfallError as error:
-
-      print("\nERROR: ", error)
-      return fetch_data()
-  
-  card_data = fetch_data() 
-
-  # Print card data (as shown on https://github.com/NandaScott/Scrython/blob/master/examples/get_and_format_card.py)
-
-  console_message = "Card data"
-  print("")
-  print(console_message)
-  print(''.center(len(console_message), '='))
-  print("")
+  context = TaggerContext(catalogs)
+  lookup = CardLookup(data_files)
 
   def show_data(card:dict):
     
@@ -657,37 +777,73 @@ def main():
 
     return string
 
-  if "card_faces" in card_data:
-    for face in card_data['card_faces']:
-      print(show_data(face))
-      if face == card_data['card_faces'][0]:
-        print("\n//\n")
-  else:
-    print(show_data(card_data))
+  answer = 'Y'
 
-  # Print TAGs
+  while answer.startswith('Y'):
 
-  console_message = "TAGs"
-  print("")
-  print(console_message)
-  print(''.center(len(console_message), '='))
-  print("")
+    # Fetch card data (from the local Scryfall data if possible, see CardLookup)
 
-  print("{:20}".format("Computing tags ..."), end ="")
-  auto_tags = automatic_tags(card_data, catalogs)
-  print("[DONE]")
+    print("\nWhich MTG card would you like to check tags for?")
 
-  print("")
-  for category in auto_tags.keys():
-    tags = ", ".join(list(map(str.lower,auto_tags[category])))
-    print("{:<15} : {:<200}".format(category.capitalize(),tags))
+    card_data = None
+
+    while card_data is None:
+
+      inp_name = input("Enter a card name then press ENTER: ")
+      print("")
+
+      try:
+
+        print("{:20}".format("Fetching data ..."), end ="")
+        card_data, source = lookup.find(inp_name)
+        print("[DONE] (%s)" % source)
+
+      except (scryfall_api.ScryfallError, OSError) as error:
+
+        # OSError covers the network errors, when working offline
+
+        print("\nERROR: ", error)
+
+    # Print card data (as shown on https://github.com/NandaScott/Scrython/blob/master/examples/get_and_format_card.py)
+
+    console_message = "Card data"
+    print("")
+    print(console_message)
+    print(''.center(len(console_message), '='))
+    print("")
+
+    if "card_faces" in card_data:
+      for face in card_data['card_faces']:
+        print(show_data(face))
+        if face == card_data['card_faces'][0]:
+          print("\n//\n")
+    else:
+      print(show_data(card_data))
+
+    # Print TAGs
+
+    console_message = "TAGs"
+    print("")
+    print(console_message)
+    print(''.center(len(console_message), '='))
+    print("")
+
+    print("{:20}".format("Computing tags ..."), end ="")
+    card_id, auto_tags = next(automatic_tags_many([card_data], context))
+    print("[DONE]")
+
+    print("")
+    for category in auto_tags.keys():
+      tags = ", ".join(list(map(str.lower,auto_tags[category])))
+      print("{:<15} : {:<200}".format(category.capitalize(),tags))
   
-  answer = of.askYesNoQuestion("\nWould you like to check tags for another MTG card? (Y/N)\n")
+    answer = of.askYesNoQuestion("\nWould you like to check tags for another MTG card? (Y/N)\n")
 
-  if answer.startswith('Y'):
-    return main()
-  elif answer.startswith('N'):
-    print("\nEND OF CODE EXECUTION")
+  # Store the remote lookups for the next sessions
+
+  lookup.save()
+
+  print("\nEND OF CODE EXECUTION")
 
 # =================================================================== #
 # =================================================================== #
@@ -697,6 +853,10 @@ def main():
 
 if __name__ == "__main__":
 
+  parser = argparse.ArgumentParser(description="Shows the automatic tags of the MTG cards you ask for.")
+  parser.add_argument("-d", "--data", nargs="+", help="Scryfall data files in which the cards are looked up before asking Scryfall (default: the %s files of the current directory)" % DATA_FILES)
+  args = parser.parse_args()
+
   columns, rows = shutil.get_terminal_size()
   print("".center(columns,"~"))
   print("")
@@ -706,4 +866,4 @@ if __name__ == "__main__":
 
   # Call main function
 
-  main()
\ No newline at end of file
+  main(args.data)
\ No newline at end of file
@@ -1,8 +1,12 @@
+import hashlib
 import json
+import os
+import pickle
 import re
-import time
 
-import scrython
+import scryfall_api
+import scryfall_bulk
+from card_store import NAME_ALIASES, CardStore, UnresolvedNames
 
 
 def ask_nb_in_range(question:str,min_int:int,max_int:int):
@@ -61,7 +65,7 @@ def parse_list(file:str):
     if line_pattern.match(line):
       
       card_name = line_pattern.match(line).group('name')
-      card_name = re.sub(r"\/", r"//", card_name) # For DFCs, Moxfield only use one slash instead of two
+      card_name = re.sub(r"\s*\/{1,2}\s*", " // ", card_name) # For DFCs, Moxfield only use one slash instead of two
       raw_tags = line_pattern.match(line).group('tags')
 
       if raw_tags is not None:
@@ -76,9 +80,9 @@ def parse_list(file:str):
 
 #############################################################################################
 
-def get_cards_data(cards_pile,file:str):
+def get_cards_data(cards_pile,file:str,update:bool=False,prune:bool=False,api_url:str=scryfall_api.API_URL,bulk_file:str=None,unresolved:UnresolvedNames=None):
 
-  """Fetches the scryfall data of each card mentioned in the cards pile and compiles them into a JSON file. This function uses the Scrython module: https://github.com/NandaScott/Scrython
+  """Fetches the scryfall data of each card mentioned in the cards pile and compiles them into a JSON file. The cards are fetched by batches through the Scryfall collection endpoint (see scryfall_api.fetch_cards).
 
     Parameters
     ----------
@@ -87,6 +91,22 @@ def get_cards_data(cards_pile,file:str):
     
     file : str
         Path to the JSON file that will be created, relative to this script.
+
+    update : bool
+        If True and the JSON file already exists, only the cards that cannot be found in it (by name, face name, flavor name or alias) are fetched and added to it.
+        Each card is stored once, even if several names of the pile refer to it.
+
+    prune : bool
+        If True, when updating, the cards of the JSON file that are no longer in the cards pile are removed from it.
+
+    api_url : str
+        Base URL of the Scryfall API.
+
+    bulk_file : str
+        Path to a local Scryfall bulk data file. If given, the cards are extracted from it instead of being fetched from the API (see scryfall_bulk).
+
+    unresolved : UnresolvedNames
+        Names that could not be resolved during the previous runs. If given, those names are not looked up again, and the names that cannot be resolved this time are added to it (and reported) instead of stopping the fetch.
       
   """
 
@@ -99,26 +119,159 @@ def get_cards_data(cards_pile,file:str):
 
   data = []
 
-  for i, card_name in enumerate(cards_pile, start=1):
-    print('Fetching card: {} | {} of {}'.format(card_name, i, len(cards_pile)))
-    search = scrython.cards.Search(q='!"%s" include:extras -is:reprint' % card_name)
-    data.append(search.data()[0])
-    time.sleep(0.5)
+  if update and os.path.isfile(file):
+    with open(file, 'r') as f:
+      data = json.load(f)
+
+  # Key the cards by their Scryfall id, so that a card is only stored once
+
+  cards_by_id = {card['id']: card for card in data}
+  card_store = CardStore(list(cards_by_id.values()), NAME_ALIASES)
+  missing_names = [card_name for card_name in cards_pile if card_name not in card_store and (unresolved is None or card_name not in unresolved)]
+
+  if prune:
+    kept_ids = set(card_store.get(card_name)['id'] for card_name in cards_pile if card_name in card_store)
+    removed = len(cards_by_id) - len(kept_ids)
+    cards_by_id = {card_id: card for card_id, card in cards_by_id.items() if card_id in kept_ids}
+    print('Removed {} card(s) that are no longer in the pile'.format(removed))
+
+  errors = {} if unresolved is not None else None
+
+  if not missing_names:
+    fetched_cards = {}
+  elif bulk_file:
+    print('Reading {} card(s) from {}'.format(len(missing_names), bulk_file))
+    fetched_cards = scryfall_bulk.read_bulk_cards(bulk_file, missing_names)
+    for card_name in missing_names:
+      if card_name not in fetched_cards:
+        print('WARNING: {} could not be found in {}'.format(card_name, bulk_file))
+        if errors is not None:
+          errors[card_name] = 'Not found in {}'.format(bulk_file)
+  else:
+    fetched_cards = scryfall_api.fetch_cards(missing_names, api_url, errors=errors)
+
+  if unresolved is not None:
+    not_found = [card_name for card_name in missing_names if card_name not in fetched_cards]
+    for card_name in not_found:
+      if not bulk_file:
+        print('WARNING: {} could not be found on Scryfall ({})'.format(card_name, errors.get(card_name, 'no card returned')))
+      unresolved.add(card_name, errors.get(card_name, 'Not found on Scryfall'))
+    if not_found:
+      print('Those cards will not be looked up again for {} day(s), fix their names in the pile or the aliases of card_store.py'.format(round(unresolved.ttl / 86400)))
+
+  for card_name in missing_names:
+    if card_name in fetched_cards:
+      cards_by_id.setdefault(fetched_cards[card_name]['id'], fetched_cards[card_name])
 
   with open(file, 'w+') as f:
-    f.write(json.dumps(data, sort_keys=True, indent=4))
+    f.write(json.dumps(list(cards_by_id.values()), sort_keys=True, indent=4))
+
+#############################################################################################
+
+# Scryfall fields kept in the slim cache of the cards data (everything else, like image URIs and prices, is never used)
+
+CARD_FIELDS = ('id','oracle_id','name','flavor_name','cmc','mana_cost','card_faces','edhrec_rank','legalities','keywords','type_line','oracle_text','colors','power','toughness','set','all_parts')
+FACE_FIELDS = ('name','flavor_name','mana_cost','type_line','oracle_text','colors','power','toughness')
+PART_FIELDS = ('id','component','name','type_line')
+
+def project_card(card:dict):
+  """
+  Only keeps the fields of the Scryfall data of a card that are used by the generator and the tagger.
+  """
+
+  slim_card = {field:card[field] for field in CARD_FIELDS if field in card}
+
+  if 'card_faces' in slim_card:
+    slim_card['card_faces'] = [{field:face[field] for field in FACE_FIELDS if field in face} for face in slim_card['card_faces']]
+  if 'all_parts' in slim_card:
+    slim_card['all_parts'] = [{field:part[field] for field in PART_FIELDS if field in part} for part in slim_card['all_parts']]
+
+  return slim_card
+
+#############################################################################################
+
+def load_cards_data(file:str):
+
+  """Loads the Scryfall data compiled by get_cards_data, through a slim binary cache only containing the fields that are actually used (see project_card).
+  The cache is rebuilt whenever the JSON file changes.
+
+    Parameters
+    ----------
+    file : str
+        Path to the JSON file containing the Scryfall data, relative to this script.
+    
+    Returns
+    -------
+    cards_data : list
+        The projected Scryfall data of each card.
+  
+  """
+
+  cache_file = os.path.splitext(file)[0] + "_slim.pickle"
+  stat = os.stat(file)
+  fields = (CARD_FIELDS,FACE_FIELDS,PART_FIELDS)
+
+  cache = None
+  if os.path.isfile(cache_file):
+    try:
+      with open(cache_file, 'rb') as f:
+        cache = pickle.load(f)
+      # A cache of another layout (other projected fields, missing keys or not a dictionary at all) is rebuilt
+      if cache['fields'] != fields or not {'mtime','size','hash','cards'} <= cache.keys():
+        cache = None
+    except (pickle.UnpicklingError, EOFError, AttributeError, ValueError, KeyError, TypeError):
+      cache = None
+
+  if cache is not None:
+
+    # Same modification time and size: the JSON file has not changed
+
+    if (cache['mtime'],cache['size']) == (stat.st_mtime_ns,stat.st_size):
+      return cache['cards']
+
+    # Otherwise, compare the content of the JSON file with the one the cache was built from
+
+    with open(file, 'rb') as f:
+      source_hash = hashlib.sha256(f.read()).hexdigest()
+
+    if cache['hash'] == source_hash:
+      cache.update({'mtime': stat.st_mtime_ns, 'size': stat.st_size})
+      with open(cache_file, 'wb') as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+      return cache['cards']
+
+  # (Re)build the cache
+
+  with open(file, 'rb') as f:
+    content = f.read()
+
+  cache = {
+    'fields': fields,
+    'mtime': stat.st_mtime_ns,
+    'size': stat.st_size,
+    'hash': hashlib.sha256(content).hexdigest(),
+    'cards': [project_card(card) for card in json.loads(content)]
+  }
+
+  with open(cache_file, 'wb') as f:
+    pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+  return cache['cards']
 
 #############################################################################################
 
-def get_catalog(file:str):
+def get_catalog(file:str,api_url:str=scryfall_api.API_URL):
 
-  """Fetches the scryfall catalogs subtypes and compiles them into a text file, along with the different card types and supertypes. This function uses the Scrython module: https://github.com/NandaScott/Scrython
+  """Fetches the scryfall catalogs subtypes and compiles them into a text file, along with the different card types and supertypes. The catalogs are fetched concurrently (see scryfall_api.fetch_catalogs).
 
     Parameters
     ----------
 
     file : str
         Path to the text file that will be created, relative to this script.
+
+    api_url : str
+        Base URL of the Scryfall API.
       
   """
 
@@ -136,29 +289,10 @@ def get_catalog(file:str):
 
   # Fetch subtypes from scryfall and add them to the list
 
-  crea_types = scrython.catalog.CreatureTypes()
-  catalogs_list.extend(crea_types.data())
-  time.sleep(0.5)
-
-  pw_types = scrython.catalog.PlaneswalkerTypes()
-  catalogs_list.extend(pw_types.data())
-  time.sleep(0.5)
-
-  art_types = scrython.catalog.ArtifactTypes()
-  catalogs_list.extend(art_types.data())
-  time.sleep(0.5)
-
-  ench_types = scrython.catalog.EnchantmentTypes()
-  catalogs_list.extend(ench_types.data())
-  time.sleep(0.5)
+  subtypes_catalogs = ["creature-types","planeswalker-types","artifact-types","enchantment-types","spell-types","land-types"]
 
-  spell_types = scrython.catalog.SpellTypes()
-  catalogs_list.extend(spell_types.data())
-  time.sleep(0.5)
-
-  land_types = scrython.catalog.LandTypes()
-  catalogs_list.extend(land_types.data())
-  time.sleep(0.5)
+  for catalog in scryfall_api.fetch_catalogs(subtypes_catalogs, api_url, progress=lambda message: None):
+    catalogs_list.extend(catalog)
 
   # Create the file
 
@@ -169,112 +303,215 @@ def get_catalog(file:str):
 
 #############################################################################################
 
-def check_curve(mana_value:int,curve:dict,current_curve:dict):
+class CurveTracker:
   """
-  Checks if there is still room on the current curve to add the mana value of the current card.
+  Mana curve of a list, built once from the desired curve (e.g. {4: 5, 5: 8, 6: 7, 7: 4}), the lowest and highest mana values also counting the cards below and above them.
+  The mana values are mapped to their slot of the curve through a precomputed table, and the number of spots and occupied spots of each slot are kept in flat lists.
   """
 
-  if mana_value <= min(curve.keys()):
-    nb_spots = curve[min(curve.keys())]
-    occ_spots = current_curve[min(curve.keys())]
-  elif mana_value >= max(curve.keys()):
-    nb_spots = curve[max(curve.keys())]
-    occ_spots = current_curve[max(curve.keys())]
-  else:
-    nb_spots = curve[mana_value]
-    occ_spots = current_curve[mana_value]
+  def __init__(self, curve:dict):
 
-  if occ_spots < nb_spots:
-    return True
-  else:
-    return False
+    self.mana_values = sorted(curve.keys())
+    self.lowest = self.mana_values[0]
+    self.highest = self.mana_values[-1]
+
+    # Slot of each mana value between the lowest and the highest ones (None if the curve has no slot for it)
+
+    self.slots = [None] * (self.highest - self.lowest + 1)
+    for slot, mana_value in enumerate(self.mana_values):
+      self.slots[mana_value - self.lowest] = slot
+
+    self.spots = [curve[mana_value] for mana_value in self.mana_values]
+    self.occupied = [0] * len(self.mana_values)
+
+  def slot(self, mana_value:int):
+    """
+    Returns the slot of the curve of the given mana value.
+    """
+
+    slot = self.slots[min(max(mana_value, self.lowest), self.highest) - self.lowest]
+    if slot is None:
+      raise KeyError(mana_value)
+
+    return slot
+
+  def fits(self, mana_value:int):
+    """
+    Checks if there is still room on the curve to add the given mana value.
+    """
+
+    slot = self.slot(mana_value)
+
+    return self.occupied[slot] < self.spots[slot]
+
+  def add(self, mana_value:int):
+    """
+    Adds the given mana value to the curve.
+    """
+
+    self.occupied[self.slot(mana_value)] += 1
+
+  def remove(self, mana_value:int):
+    """
+    Removes the given mana value from the curve.
+    """
+
+    self.occupied[self.slot(mana_value)] -= 1
+
+  def snapshot(self):
+    """
+    Returns the occupied spots of the curve, to be restored later (see restore).
+    """
+
+    return tuple(self.occupied)
+
+  def restore(self, snapshot:tuple):
+    """
+    Restores the occupied spots of the curve from a snapshot.
+    """
+
+    self.occupied[:] = snapshot
+
+  def copy(self):
+    """
+    Returns a tracker of the same curve with the same occupied spots, sharing the precomputed tables with this one.
+    """
+
+    tracker = object.__new__(CurveTracker)
+    tracker.__dict__.update(self.__dict__)
+    tracker.occupied = list(self.occupied)
+
+    return tracker
+
+  def current_curve(self):
+    """
+    Returns the number of occupied spots of each mana value of the curve.
+    """
+
+    return dict(zip(self.mana_values, self.occupied))
 
 #############################################################################################
 
-def add_to_curve(mana_value:int,current_curve:dict):
+# Colours explicitly mentioned in the hard costs patterns, any other letter standing for a generic colour
+
+COLOURS = "WUBRGC"
+
+def colour_counts(mana_cost:str):
   """
-  Adds the mana value of the current card to the current curve.
+  Extracts the colour count from a mana cost (e.g. from "{3}{B}{W}{W}" to (2, 0, 1, 0, 0, 0, ())), as used by the hard costs checks.
+  The first six values are the counts of the WUBRGC colours, the last one holds the counts of the other symbols (e.g. X or the slash of hybrid costs), sorted by symbol.
   """
 
-  if mana_value <= min(current_curve.keys()):
-    current_curve[min(current_curve.keys())] += 1
-  elif mana_value >= max(current_curve.keys()):
-    current_curve[max(current_curve.keys())] += 1
-  else:
-    current_curve[mana_value] += 1
+  colour_cost = re.sub(r"\{|\}|[1-9]",'',mana_cost)
+
+  counts = tuple(colour_cost.count(colour) for colour in COLOURS)
+  others = tuple(sorted((letter, colour_cost.count(letter)) for letter in set(colour_cost) if letter not in COLOURS))
+
+  return counts + (others,)
 
 #############################################################################################
 
-def check_hard_costs(mana_costs:list,hard_costs:dict,current_costs:dict):
+class HardCostMatcher:
   """
-  Check if the mana cost(s) of the card match one of patterns in hard_costs. It it doesn't, it returns add_card = True. It it does and there is still room for it, it returns add_card = True and indicates the corresponding current_costs number(s) that need to be increased. Otherwise, it returns add_card = False
+  Compiled form of a hard costs limitation (e.g. "MMM, MMNNOO": 3), whose patterns are parsed once to be matched against the colour counts of the cards (see colour_counts).
   """
 
-  # Initialize some variables
+  def __init__(self, costs:str, number):
 
-  add_card = True
-  increase_current_costs = {costs:False for costs in current_costs}
+    self.costs = costs
+    self.number = number
+    self.patterns = []
+    self.results = {} # Results of the previous matches, the same mana costs being matched again and again
 
-  # Analyze the mana cost(s) in regards to each possible hard costs
+    patterns = costs.split(',')
+    patterns = [cost.strip() for cost in patterns if cost != '']
 
-  for mana_cost in mana_costs:
+    for pattern in patterns:
 
-    # Extract the colour count from mana cost (e.g. from "{3}{B}{W}{W}" to {'W': 2, 'B': 1})
+      # Extract the pattern count in the same way as for the mana cost (e.g. from "AADD" to  {'D': 2, 'A': 2})
 
-    colour_cost = re.sub(r"\{|\}|[1-9]",'',mana_cost)
-    colour_count = {letter:colour_cost.count(letter) for letter in set(colour_cost)}
+      pattern_count = {letter:pattern.count(letter) for letter in set(pattern)}
 
-    # Iterate over the costs
-  
-    for costs, number in hard_costs.items():
-        
-      patterns = costs.split(',')
-      patterns = [cost.strip() for cost in patterns if cost != '']
-      
-      for pattern in patterns:
-        
-        # Extract the pattern count in the same way as for the mana cost (e.g. from "AADD" to  {'D': 2, 'A': 2})
+      # Check if the pattern cares about both specific and generic colours
 
-        pattern_count = {letter:pattern.count(letter) for letter in set(pattern)}
-    
-        # Check if the pattern cares about both specific and generic colours
+      cares_about_both = any(letter in COLOURS for letter in pattern_count) and any(letter not in COLOURS for letter in pattern_count)
+
+      # Specific colours (WUBRGC) and their count, colours not mentioned in the pattern and counts of the generic colours (other arbitrary letters)
+
+      specific = tuple((position, pattern_count[colour]) for position, colour in enumerate(COLOURS) if colour in pattern_count)
+      free_colours = tuple(position for position, colour in enumerate(COLOURS) if colour not in pattern_count)
+      leftover_pattern = [count for letter,count in pattern_count.items() if letter not in COLOURS]
+      generic = tuple((value, leftover_pattern.count(value)) for value in set(leftover_pattern))
+
+      self.patterns.append((specific, free_colours, frozenset(pattern_count), generic, cares_about_both))
+
+  def matches(self, counts:tuple):
+    """
+    Checks if the colour counts of a mana cost match one of the patterns.
+    """
+
+    if counts not in self.results:
+      self.results[counts] = self.match(counts)
+
+    return self.results[counts]
+
+  def match(self, counts:tuple):
+    """
+    Matches the colour counts of a mana cost against the patterns (see matches).
+    """
+
+    for specific, free_colours, letters, generic, cares_about_both in self.patterns:
+
+      # Check for specific coulours (WUBRGC)
+
+      specific_check = any(counts[position] >= number for position, number in specific)
+
+      # Check for generic colours, ignoring the specific colours that were explicitly mentioned in the pattern
+
+      leftover_cost = [counts[position] for position in free_colours if counts[position]] + [count for letter, count in counts[6] if letter not in letters]
+      generic_check = any(count <= sum(1 for co in leftover_cost if co >= value) for value, count in generic)
+
+      if (not cares_about_both and (specific_check or generic_check)) or (cares_about_both and specific_check and generic_check):
+        return True
+
+    return False
+
+#############################################################################################
+
+def compile_hard_costs(hard_costs:dict):
+  """
+  Compiles each hard costs limitation (see HardCostMatcher), in the order of hard_costs.
+  """
+
+  return [HardCostMatcher(costs, number) for costs, number in hard_costs.items()]
+
+#############################################################################################
+
+def match_hard_costs(card_counts:list,matchers:list,current_costs:dict):
+  """
+  Same as check_hard_costs, from the colour counts of the mana cost(s) of the card (see colour_counts) and the compiled hard costs (see compile_hard_costs).
+  """
+
+  add_card = True
+  increase_current_costs = {costs:False for costs in current_costs}
+
+  for matcher in matchers:
+    if any(matcher.matches(counts) for counts in card_counts):
+      if current_costs[matcher.costs] == matcher.number:
+        add_card = False
+      else:
+        increase_current_costs[matcher.costs] = True
 
-        if any(letter in ["W","U","B","R","G","C"] for letter in pattern_count.keys()) and any(letter not in ["W","U","B","R","G","C"] for letter in pattern_count.keys()):
-          cares_about_both = True
-        else:
-          cares_about_both = False
-    
-        # Check for specific coulours (WUBRGC)
-
-        if any(colour_count.get(letter,0) >= pattern_count.get(letter,float('inf')) for letter in ["W","U","B","R","G","C"]):
-          specific_check = True
-        else:
-          specific_check = False
-            
-        # Remove data about specific colours that were explicitly mentioned in the pattern
-
-        leftover_cost = list({letter:count for letter,count in colour_count.items() if letter not in pattern_count.keys()}.values())
-        leftover_cost_count = {value:leftover_cost.count(value) for value in set(leftover_cost)}
-        leftover_pattern = list({letter:count for letter,count in pattern_count.items() if letter not in ["W","U","B","R","G","C"]}.values())
-        leftover_pattern_count = {value:leftover_pattern.count(value) for value in set(leftover_pattern)}
-        
-        # Check for generic colours (other arbitrary letters)
-
-        generic_check = False
-        for value, count in leftover_pattern_count.items():
-          if count <= sum([co for val, co in leftover_cost_count.items() if val >= value]):
-            generic_check = True
-        
-        # Define if the card can be added or not, and if the current hard costs counters need to be increased
-
-        if (not cares_about_both and (specific_check or generic_check)) or (cares_about_both and specific_check and generic_check):
-          if current_costs[costs] == number:
-            add_card = False
-          else:
-            increase_current_costs[costs] = True
-            break
-  
   if add_card == False:
     return False
   else:
     return increase_current_costs
+
+#############################################################################################
+
+def check_hard_costs(mana_costs:list,hard_costs:dict,current_costs:dict):
+  """
+  Check if the mana cost(s) of the card match one of patterns in hard_costs. It it doesn't, it returns add_card = True. It it does and there is still room for it, it returns add_card = True and indicates the corresponding current_costs number(s) that need to be increased. Otherwise, it returns add_card = False
+  """
+
+  return match_hard_costs([colour_counts(mana_cost) for mana_cost in mana_costs],compile_hard_costs(hard_costs),current_costs)
@@ -0,0 +1,96 @@
+import contextlib
+import cProfile
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+#############################################################################################
+
+class PhaseProfiler:
+  """
+  Records the wall time, CPU time and peak memory (traced with tracemalloc) of each phase of a run, to be written as a JSON report in report_file.
+  A phase can also be profiled with cProfile, its statistics being dumped to cprofile_file, which can be read with pstats or snakeviz.
+  Without a report file, the profiler does nothing, so that the phases can always be delimited.
+  """
+
+  def __init__(self, report_file:str=None, cprofile_file:str=None, cprofile_phase:str="selection"):
+
+    self.enabled = report_file is not None
+    self.report_file = report_file
+    self.cprofile_phase = cprofile_phase
+    self.cprofile_file = cprofile_file
+    self.phases = {}
+
+    if self.enabled and not tracemalloc.is_tracing():
+      tracemalloc.start()
+
+  @contextlib.contextmanager
+  def phase(self, name:str):
+    """
+    Measures the enclosed code as the given phase. The measures of a phase run several times are added up (the peak memory being the highest one).
+    """
+
+    if not self.enabled:
+      yield
+      return
+
+    # Only the peak reached during the phase is of interest (tracemalloc.reset_peak requires Python 3.9+, the peak since the start being kept otherwise)
+
+    if hasattr(tracemalloc, 'reset_peak'):
+      tracemalloc.reset_peak()
+
+    profile = cProfile.Profile() if name == self.cprofile_phase and self.cprofile_file else None
+
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+
+    if profile:
+      profile.enable()
+
+    try:
+      yield
+    finally:
+
+      if profile:
+        profile.disable()
+        profile.dump_stats(self.cprofile_file)
+
+      wall = time.perf_counter() - start
+      cpu = time.process_time() - start_cpu
+      current, peak = tracemalloc.get_traced_memory()
+
+      measures = self.phases.setdefault(name, {'wall': 0, 'cpu': 0, 'peak_memory': 0, 'calls': 0})
+      measures['wall'] += wall
+      measures['cpu'] += cpu
+      measures['peak_memory'] = max(measures['peak_memory'], peak)
+      measures['calls'] += 1
+
+  def report(self):
+    """
+    Returns the measures of the phases (times in seconds, memory in bytes) and their total, which leaves out the time spent waiting for the user.
+    """
+
+    return {
+      'date': datetime.now().isoformat(timespec='seconds'),
+      'python': platform.python_version(),
+      'phases': self.phases,
+      'total': {
+        'wall': sum(measures['wall'] for measures in self.phases.values()),
+        'cpu': sum(measures['cpu'] for measures in self.phases.values()),
+        'peak_memory': max([measures['peak_memory'] for measures in self.phases.values()], default=0)
+      },
+      'cprofile': self.cprofile_file if self.cprofile_phase in self.phases else None
+    }
+
+  def write(self):
+    """
+    Writes the JSON report of the run (see report).
+    """
+
+    if not self.enabled:
+      return
+
+    with open(self.report_file, 'w', encoding='utf-8') as f:
+      json.dump(self.report(), f, indent=2)
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# Scryfall API (see https://scryfall.com/docs/api), the base URL can be pointed to another server (e.g. a local stub for testing)
+
+API_URL = "https://api.scryfall.com"
+HEADERS = {"User-Agent": "LADLG/1.0", "Accept": "application/json"}
+
+COLLECTION_SIZE = 75   # Maximum number of identifiers per request to the /cards/collection endpoint
+RATE_LIMIT = 10        # Maximum number of requests per second, as asked by Scryfall (50 to 100 milliseconds between requests)
+MAX_CONCURRENCY = 4    # Maximum number of requests waiting for an answer at the same time
+MAX_RETRIES = 5        # Maximum number of retries of a request answered by a 429 or 5xx error, or that failed to reach the API
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TIMEOUT = 30           # Maximum time (in seconds) to wait for the API to answer a request
+
+#############################################################################################
+
+class ScryfallError(Exception):
+  """
+  Error object returned by the Scryfall API.
+  """
+
+  def __init__(self, error_obj:dict):
+    super().__init__(error_obj.get('details', 'Unknown Scryfall error'))
+    self.error_details = error_obj
+
+  @property
+  def not_found(self):
+    """
+    Whether the error means that the requested object does not exist, rather than that the request failed.
+    """
+
+    return self.error_details.get('status') == 404 or self.error_details.get('code') == 'not_found'
+
+#############################################################################################
+
+class RateLimiter:
+  """
+  Token bucket shared by all the requests to the API, whether they are sent from threads or from coroutines.
+  The rate is halved each time the API answers that there are too many requests (429), then slowly goes back to its nominal value.
+  """
+
+  def __init__(self, rate:float, capacity:float=1):
+    self.nominal_rate = rate
+    self.rate = rate
+    self.capacity = capacity
+    self.tokens = capacity
+    self.last_update = time.monotonic()
+    self.lock = threading.Lock()
+
+  def reserve(self):
+    """
+    Takes a token from the bucket and returns the time to wait (in seconds) before it can be used.
+    """
+
+    with self.lock:
+      now = time.monotonic()
+      self.tokens = min(self.capacity, self.tokens + (now - self.last_update) * self.rate)
+      self.last_update = now
+      self.tokens -= 1
+      return max(0.0, -self.tokens / self.rate)
+
+  def wait(self):
+    time.sleep(self.reserve())
+
+  async def acquire(self):
+    await asyncio.sleep(self.reserve())
+
+  def slow_down(self):
+    with self.lock:
+      self.rate = max(1.0, self.rate / 2)
+
+  def recover(self):
+    with self.lock:
+      self.rate = min(self.nominal_rate, self.rate * 1.1)
+
+LIMITER = RateLimiter(RATE_LIMIT)
+
+#############################################################################################
+
+def _send_request(path:str, payload:dict=None, api_url:str=API_URL):
+  """
+  Sends a single request to the Scryfall API (a POST request with a JSON body if a payload is given, a GET request otherwise) and returns the decoded JSON answer, errors included.
+  A request that fails to reach the API (e.g. a timeout or a lost connection) is answered by a 503 error object, so that it is retried like the other server errors.
+  """
+
+  data = json.dumps(payload).encode('utf-8') if payload is not None else None
+  headers = dict(HEADERS, **({"Content-Type": "application/json"} if data else {}))
+  request = urllib.request.Request(api_url.rstrip("/") + path, data=data, headers=headers)
+
+  try:
+    with urllib.request.urlopen(request, timeout=TIMEOUT) as response:
+      return json.loads(response.read().decode('utf-8'))
+  except urllib.error.HTTPError as error:
+    try:
+      return json.loads(error.read().decode('utf-8'))
+    except ValueError:
+      return {'object': 'error', 'status': error.code, 'details': str(error)}
+  except OSError as error:
+    # URLError and the timeouts are OSErrors too
+    return {'object': 'error', 'status': 503, 'code': 'unreachable', 'details': "Could not reach %s (%s)" % (api_url, error)}
+
+def _retry_delay(answer:dict, attempt:int):
+  """
+  Returns the time to wait (in seconds) before retrying a request that got the given answer, or None if it must not be retried.
+  """
+
+  if answer.get('object') != 'error' or answer.get('status') not in RETRY_STATUSES or attempt == MAX_RETRIES:
+    return None
+
+  if answer.get('status') == 429:
+    LIMITER.slow_down()
+
+  return 0.5 * 2 ** attempt * (1 + random.random())
+
+def _check_answer(answer:dict):
+  if answer.get('object') == 'error':
+    raise ScryfallError(answer)
+  LIMITER.recover()
+  return answer
+
+#############################################################################################
+
+def api_request(path:str, payload:dict=None, api_url:str=API_URL):
+  """
+  Sends a request to the Scryfall API through the shared rate limiter, retrying it with an exponential backoff if the API is overloaded, and returns the decoded JSON answer.
+  """
+
+  for attempt in range(MAX_RETRIES + 1):
+    LIMITER.wait()
+    answer = _send_request(path, payload, api_url)
+    delay = _retry_delay(answer, attempt)
+    if delay is None:
+      break
+    time.sleep(delay)
+
+  return _check_answer(answer)
+
+async def api_request_async(path:str, payload:dict=None, api_url:str=API_URL, semaphore:asyncio.Semaphore=None):
+  """
+  Asynchronous version of api_request. The requests are sent from worker threads, at most as many at a time as the semaphore allows.
+  """
+
+  loop = asyncio.get_running_loop()
+
+  for attempt in range(MAX_RETRIES + 1):
+    await LIMITER.acquire()
+    if semaphore is not None:
+      async with semaphore:
+        answer = await loop.run_in_executor(None, _send_request, path, payload, api_url)
+    else:
+      answer = await loop.run_in_executor(None, _send_request, path, payload, api_url)
+    delay = _retry_delay(answer, attempt)
+    if delay is None:
+      break
+    await asyncio.sleep(delay)
+
+  return _check_answer(answer)
+
+#############################################################################################
+
+def _search_path(card_name:str):
+  return "/cards/search?" + urllib.parse.urlencode({'q': '!"%s" include:extras -is:reprint' % card_name})
+
+def search_card(card_name:str, api_url:str=API_URL):
+  """
+  Returns the Scryfall data of the original printing of a card, searched by its exact name.
+  """
+
+  return api_request(_search_path(card_name), api_url=api_url)['data'][0]
+
+async def search_card_async(card_name:str, api_url:str=API_URL, semaphore:asyncio.Semaphore=None):
+  answer = await api_request_async(_search_path(card_name), api_url=api_url, semaphore=semaphore)
+  return answer['data'][0]
+
+#############################################################################################
+
+async def fetch_collection_async(card_names:list, api_url:str=API_URL, semaphore:asyncio.Semaphore=None):
+  """
+  Resolves a batch of card names (at most COLLECTION_SIZE) through the /cards/collection endpoint.
+  Returns a dictionary of the Scryfall data of the resolved cards (keyed by the requested name) and the list of the names that could not be resolved.
+  """
+
+  identifiers = [{'name': card_name} for card_name in card_names]
+  answer = await api_request_async("/cards/collection", {'identifiers': identifiers}, api_url, semaphore)
+
+  # The cards are returned in the order of the identifiers, skipping those that were not found
+
+  not_found = [identifier['name'] for identifier in answer.get('not_found', [])]
+  found_names = [card_name for card_name in card_names if card_name not in not_found]
+
+  return dict(zip(found_names, answer['data'])), not_found
+
+#############################################################################################
+
+class Progress:
+  """
+  Reports the number of completed requests of a fetching step.
+  """
+
+  def __init__(self, message:str, total:int, report=print):
+    self.message = message
+    self.total = total
+    self.done = 0
+    self.report = report
+
+  def step(self, detail:str=""):
+    self.done += 1
+    self.report('{} | {} of {}{}'.format(self.message, self.done, self.total, (" (%s)" % detail) if detail else ""))
+
+#############################################################################################
+
+async def fetch_cards_async(card_names:list, api_url:str=API_URL, progress=print, errors:dict=None):
+  """
+  Asynchronous version of fetch_cards.
+  """
+
+  semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+  # Resolve the names by batches through the collection endpoint
+
+  batches = [card_names[start:start + COLLECTION_SIZE] for start in range(0, len(card_names), COLLECTION_SIZE)]
+  batch_progress = Progress('Fetching card batches (collection)', len(batches), progress)
+
+  async def fetch_batch(batch):
+    result = await fetch_collection_async(batch, api_url, semaphore)
+    batch_progress.step("%s cards" % len(batch))
+    return result
+
+  cards = {}
+  unresolved = []
+
+  for found, not_found in await asyncio.gather(*[fetch_batch(batch) for batch in batches]):
+    for card_name, card in found.items():
+      if card.get('reprint'):
+        unresolved.append(card_name)
+      else:
+        cards[card_name] = card
+    unresolved.extend(not_found)
+
+  # Search the remaining names one by one
+
+  search_progress = Progress('Fetching cards (search)', len(unresolved), progress)
+
+  async def search(card_name):
+    try:
+      card = await search_card_async(card_name, api_url, semaphore)
+    except ScryfallError as error:
+      # Only the names Scryfall does not know are collected, any other error (e.g. an outage outlasting the retries) stopping the fetch
+      if errors is None or not error.not_found:
+        raise
+      errors[card_name] = str(error)
+      card = None
+    search_progress.step(card_name)
+    return card
+
+  for card_name, card in zip(unresolved, await asyncio.gather(*[search(card_name) for card_name in unresolved])):
+    if card is not None:
+      cards[card_name] = card
+
+  return cards
+
+def fetch_cards(card_names:list, api_url:str=API_URL, progress=print, errors:dict=None):
+  """
+  Fetches the Scryfall data of the given cards, by batches of COLLECTION_SIZE names through the /cards/collection endpoint.
+  The collection endpoint does not necessarily return the original printing of the cards, so a search (one request per card) is used for the names it could not resolve and for the cards it returned as reprints.
+  Returns a dictionary of the Scryfall data of each card, keyed by the requested name.
+  If an errors dictionary is given, the names that Scryfall does not know (404 answers) are left out and their errors stored in it, instead of raising a ScryfallError. Other errors are always raised.
+  """
+
+  return asyncio.run(fetch_cards_async(card_names, api_url, progress, errors))
+
+#############################################################################################
+
+async def fetch_catalogs_async(catalog_names:list, api_url:str=API_URL, progress=print):
+  """
+  Asynchronous version of fetch_catalogs.
+  """
+
+  semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+  catalog_progress = Progress('Fetching catalogs', len(catalog_names), progress)
+
+  async def fetch_catalog(catalog_name):
+    answer = await api_request_async("/catalog/" + catalog_name, api_url=api_url, semaphore=semaphore)
+    catalog_progress.step(catalog_name)
+    return answer['data']
+
+  return await asyncio.gather(*[fetch_catalog(catalog_name) for catalog_name in catalog_names])
+
+def fetch_catalogs(catalog_names:list, api_url:str=API_URL, progress=print):
+  """
+  Fetches the given Scryfall catalogs (e.g. "creature-types") and returns their content, in the same order.
+  """
+
+  return asyncio.run(fetch_catalogs_async(catalog_names, api_url, progress))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import json
+
+#############################################################################################
+
+def iter_bulk_cards(file:str, chunk_size:int=1<<20):
+  """
+  Iterates over the cards of a Scryfall bulk data file (see https://scryfall.com/docs/api/bulk-data), a JSON array of card objects that can weigh hundreds of MB.
+  The file is read and decoded incrementally, so that only the current chunk is held in memory. Gzipped files (.gz) are also accepted.
+  """
+
+  decoder = json.JSONDecoder()
+  opener = gzip.open if file.endswith(".gz") else open
+
+  with opener(file, 'rt', encoding='utf-8') as f:
+
+    buffer = ""
+    position = 0
+    started = False
+    end_of_file = False
+
+    while True:
+
+      # Skip whitespace and the array delimiters
+
+      while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+        if buffer[position] == "[":
+          started = True
+        elif buffer[position] == "]":
+          return
+        position += 1
+
+      if position == len(buffer):
+        if end_of_file:
+          return
+        buffer = f.read(chunk_size)
+        position = 0
+        end_of_file = (buffer == "")
+        continue
+
+      if not started:
+        raise ValueError("%s is not a JSON array of cards" % file)
+
+      # Decode the next card, reading more of the file if it is incomplete
+
+      try:
+        card, end = decoder.raw_decode(buffer, position)
+      except json.JSONDecodeError:
+        chunk = f.read(chunk_size)
+        if chunk == "":
+          raise
+        buffer = buffer[position:] + chunk
+        position = 0
+        continue
+
+      position = end
+      yield card
+
+#############################################################################################
+
+def card_names(card:dict):
+  """
+  Returns all the names a card can be referred to by in a card pile: its name, the names of its faces and its flavor names.
+  """
+
+  names = [card['name']]
+
+  for face in card.get('card_faces',[]):
+    names.append(face['name'])
+    if face.get('flavor_name'):
+      names.append(face['flavor_name'])
+
+  if card.get('flavor_name'):
+    names.append(card['flavor_name'])
+
+  return names
+
+#############################################################################################
+
+def read_bulk_cards(file:str, names):
+  """
+  Extracts the Scryfall data of the given cards from a bulk data file, without holding the whole file in memory.
+  As with the searches of get_cards_data, the original printing of each card is kept when the file contains several printings (e.g. "default-cards").
+  Returns a dictionary of the Scryfall data of each card found, keyed by the requested name.
+  """
+
+  wanted = set(names)
+  cards = {}
+
+  for card in iter_bulk_cards(file):
+    for name in card_names(card):
+      if name in wanted and (name not in cards or (cards[name].get('reprint') and not card.get('reprint'))):
+        cards[name] = card
+
+  return cards
+
+# =================================================================== #
+# =================================================================== #
+#                          CALL MAIN FUNCTION                         #
+# =================================================================== #
+# =================================================================== #
+
+if __name__ == "__main__":
+
+  import other_functions as of
+  from card_store import NAME_ALIASES
+
+  parser = argparse.ArgumentParser(description="Compiles the Scryfall data of the cards of one or several piles from a local Scryfall bulk data file.")
+  parser.add_argument("bulk_file", help="Scryfall bulk data file (e.g. oracle-cards or default-cards, possibly gzipped)")
+  parser.add_argument("piles", nargs="+", help="Card pile files, as exported from Moxfield")
+  parser.add_argument("-o", "--output", required=True, help="JSON file to create")
+  args = parser.parse_args()
+
+  card_pile = {}
+  for pile_file in args.piles:
+    for card_name, card_tags in of.parse_list(pile_file).items():
+      card_pile[NAME_ALIASES.get(card_name, card_name)] = card_tags
+
+  of.get_cards_data(card_pile, args.output, bulk_file=args.bulk_file)
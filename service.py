@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+
+########################################################################################################################################################
+##                                                      LIVING ANTHOLOGY DECKS GENERATOR SERVICE                                                      ##
+##                                                                                                                                                    ##
+##         Keeps the pile of a deck, its Scryfall data, the catalogs and the tags in memory, and answers tagging and generation requests locally.     ##
+##                                     /!\ In order to run, this script requires Python 3.7+ as well as YAML. /!\                                     ##
+########################################################################################################################################################
+
+import argparse
+import json
+import math
+import os
+import random
+import socketserver
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import generator as gen
+import mtg_tagger
+import solver
+
+# Data of a chosen card sent back by the service (see list_summary)
+
+CARD_FIELDS = ('name', 'mv', 'mana_costs', 'rank', 'tags', 'reason', 'status')
+
+# Scryfall fields needed to tag a card sent with a tagging request, the last ones being read from the faces of the cards that have some
+
+REQUIRED_FIELDS = ('id', 'name', 'type_line', 'keywords', 'set')
+REQUIRED_FACE_FIELDS = ('oracle_text', 'mana_cost', 'colors')
+
+# Selections of the cards that can be requested (see batch.run_theme)
+
+ENGINES = ('greedy', 'solver')
+
+#############################################################################################
+
+class NotFound(Exception):
+  """
+  Raised when a request names a theme or a card that the deck does not have (answered with a 404).
+  """
+
+#############################################################################################
+
+class DeckService:
+  """
+  Everything needed to tag the cards and generate the lists of a deck, loaded once (see batch.load_deck) and kept in memory between the requests.
+  The configuration file and the card pile are reloaded on request (see reload), the tags of the cards being kept in the tag cache.
+  """
+
+  def __init__(self, config_file:str):
+
+    self.config_file = config_file
+    self.catalogs = gen.load_catalogs()
+    self.reload()
+
+  def reload(self):
+    """
+    Loads the configuration file of the deck, its pile, the Scryfall data and the tags of its cards (see generator.prepare_cards).
+    Everything is loaded before any of it replaces the current data, so that a failed reload leaves the service as it was.
+    """
+
+    start = time.perf_counter()
+
+    config = gen.load_config(self.config_file)
+    card_pile = gen.load_pile(config)
+    card_store = gen.load_cards(config, card_pile)
+    ranks = gen.rank_limits(card_store)
+    gen.remove_missing_cards(config, card_pile)
+
+    tag_cache = gen.load_tag_cache(config, self.catalogs)
+    tag_bits = gen.TagBits()
+    cards = gen.prepare_cards(card_pile, card_store, config, tag_cache, ranks, tag_bits, gen.snapshot_file(config))
+    tag_cache.save()
+
+    self.config, self.card_pile, self.card_store, self.ranks = config, card_pile, card_store, ranks
+    self.tag_cache, self.tag_bits, self.cards = tag_cache, tag_bits, cards
+    self.themes = {}
+
+    return {
+      'deck': os.path.splitext(os.path.basename(self.config_file))[0],
+      'cards': len(self.card_pile),
+      'themes': sorted(self.config['themes'].keys()),
+      'load_time': time.perf_counter() - start
+    }
+
+  def theme(self, theme_name:str):
+    """
+    Returns the settings of a theme (see generator.load_theme), loaded the first time the theme is requested.
+    """
+
+    if theme_name not in self.themes:
+      if theme_name not in self.config['themes'] and theme_name not in (gen.NO_THEME, gen.PILE_ANALYSIS):
+        raise NotFound("Unknown theme '%s' (available themes: %s)" % (theme_name, ", ".join(sorted(self.config['themes'].keys()))))
+      self.themes[theme_name] = gen.load_theme(self.config, theme_name, self.tag_bits, len(self.card_pile))
+
+    return self.themes[theme_name]
+
+  def tag(self, request:dict):
+    """
+    Returns the automatic tags of a card, given either by its name (looked up in the Scryfall data of the deck) or by its Scryfall data.
+    The tags of the cards of the deck come from the tag cache, while the cards sent with the request are tagged without being stored in it.
+    """
+
+    if 'card' not in request:
+      if request.get('name') not in self.card_store:
+        raise NotFound("Card '%s' is not in the Scryfall data of the deck" % request.get('name'))
+      card = self.card_store.get(request['name'])
+      return {'name': card['name'], 'tags': self.tag_cache.automatic_tags(card)}
+
+    card = request['card']
+    if not isinstance(card, dict):
+      raise ValueError("The card must be given as a JSON object of Scryfall data")
+
+    missing = [field for field in REQUIRED_FIELDS if field not in card]
+    if 'card_faces' not in card:
+      missing += [field for field in REQUIRED_FACE_FIELDS if field not in card]
+    if missing:
+      raise ValueError("The Scryfall data of the card miss the following fields: %s" % ", ".join(missing))
+
+    try:
+      card_id, tags = next(mtg_tagger.automatic_tags_many([card], self.tag_cache.context))
+    except (KeyError, TypeError, AttributeError, IndexError) as error:
+      raise ValueError("The Scryfall data of the card could not be tagged (%s: %s)" % (type(error).__name__, error))
+
+    return {'name': card['name'], 'tags': tags}
+
+  def generate(self, request:dict):
+    """
+    Generates the list of a theme, the pile being shuffled with the given seed (a random one by default, sent back for reproducibility).
+    The engine and the time budget of the solver default to those of the configuration file (see batch.run_theme).
+    Raises ValueError if one of the parameters is not valid.
+    """
+
+    theme_name = request.get('theme', gen.NO_THEME)
+    if not isinstance(theme_name, str):
+      raise ValueError("The theme must be given by its name")
+
+    seed = request.get('seed')
+    if seed is None:
+      seed = random.randrange(2**32)
+    elif not isinstance(seed, int) or isinstance(seed, bool):
+      raise ValueError("The seed must be an integer, not %s" % json.dumps(seed))
+
+    engine = request.get('engine')
+    if engine is None:
+      engine = self.config['general'].get('engine', 'greedy')
+    elif engine not in ENGINES:
+      raise ValueError("Unknown engine %s (available engines: %s)" % (json.dumps(engine), ", ".join(ENGINES)))
+
+    time_budget = request.get('time_budget')
+    if time_budget is None:
+      time_budget = self.config['general'].get('time_budget', 1.0)
+    elif not isinstance(time_budget, (int, float)) or isinstance(time_budget, bool) or not 0 < time_budget < math.inf:
+      raise ValueError("The time budget must be a positive number of seconds, not %s" % json.dumps(time_budget))
+
+    theme_data = self.theme(theme_name)
+
+    names_list = list(self.card_pile)
+    random.Random(seed).shuffle(names_list)
+
+    if engine == "solver":
+      results = solver.solve_list(self.cards, names_list, theme_data, time_budget)
+    else:
+      results = gen.generate_list(self.cards, names_list, theme_data)
+
+    return dict(list_summary(results), seed=seed, engine=engine)
+
+  def analyze(self, request:dict):
+    """
+    Lists all the cards of the pile with their tags and statuses, as the pile analysis of main.py does.
+    """
+
+    theme_data = self.theme(gen.PILE_ANALYSIS)
+
+    return list_summary(gen.generate_list(self.cards, sorted(self.card_pile), theme_data))
+
+#############################################################################################
+
+def list_summary(results:dict):
+  """
+  Converts the results of the generation of a list (see generator.generate_list) to JSON-friendly data, keeping only the displayed data of the chosen cards (see CARD_FIELDS).
+  """
+
+  return {
+    'theme': results['theme'],
+    'cards': [{field: card[field] for field in CARD_FIELDS} for card in results['cards']],
+    'filler_count': results['filler_count'],
+    'lim_status': results['lim_status'],
+    'current_costs': results['current_costs'],
+    'current_curve': results['current_curve']
+  }
+
+#############################################################################################
+
+def json_safe(value):
+  """
+  Replaces the infinite and undefined numbers (e.g. the maxima of the unlimited statuses) by null, as they are not valid JSON.
+  """
+
+  if isinstance(value, float) and not math.isfinite(value):
+    return None
+  if isinstance(value, dict):
+    return {key: json_safe(item) for key, item in value.items()}
+  if isinstance(value, (list, tuple)):
+    return [json_safe(item) for item in value]
+  return value
+
+#############################################################################################
+
+class RequestHandler(BaseHTTPRequestHandler):
+  """
+  Answers the requests sent to the service, as JSON objects both ways:
+    - GET /status: the deck being served
+    - POST /tag: {"name": ...} or {"card": Scryfall data}
+    - POST /generate: {"theme": ..., "seed": ..., "engine": ..., "time_budget": ...}, all optional
+    - POST /analyze: {}
+    - POST /reload: {}, to take changes of the configuration file or of the card pile into account
+  """
+
+  service = None
+
+  def do_GET(self):
+
+    if self.path == "/status":
+      self.answer(200, {'deck': self.service.config_file, 'cards': len(self.service.card_pile), 'themes': sorted(self.service.config['themes'].keys())})
+    else:
+      self.answer(404, {'error': "Unknown path %s" % self.path})
+
+  def do_POST(self):
+
+    actions = {
+      "/tag": self.service.tag,
+      "/generate": self.service.generate,
+      "/analyze": self.service.analyze,
+      "/reload": lambda request: self.service.reload()
+    }
+
+    if self.path not in actions:
+      self.answer(404, {'error': "Unknown path %s" % self.path})
+      return
+
+    try:
+      length = int(self.headers.get('Content-Length', 0))
+      request = json.loads(self.rfile.read(length) or b"{}")
+      if not isinstance(request, dict):
+        raise ValueError("The body of the request must be a JSON object")
+      start = time.perf_counter()
+      answer = actions[self.path](request)
+      answer['time'] = time.perf_counter() - start
+    except NotFound as error:
+      self.answer(404, {'error': str(error)})
+    except ValueError as error:
+      self.answer(400, {'error': str(error)})
+    except Exception as error:
+      traceback.print_exc()
+      self.answer(500, {'error': "%s: %s" % (type(error).__name__, error)})
+    else:
+      self.answer(200, answer)
+
+  def answer(self, code:int, content:dict):
+
+    body = json.dumps(json_safe(content), allow_nan=False).encode('utf-8')
+    self.send_response(code)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def address_string(self):
+
+    # Unix sockets have no client address
+    return self.client_address[0] if self.client_address else "unix"
+
+#############################################################################################
+
+class UnixHTTPServer(socketserver.UnixStreamServer):
+  """
+  HTTP server listening on a Unix socket instead of a TCP port.
+  """
+
+  def get_request(self):
+
+    request, client_address = super().get_request()
+    return request, ("unix", 0)
+
+#############################################################################################
+
+def main():
+
+  parser = argparse.ArgumentParser(description="Keeps a deck in memory and answers tagging and generation requests over localhost HTTP or a Unix socket.")
+  parser.add_argument("-c", "--config", default="dragons.yml", help="YAML configuration file of the deck (default: %(default)s)")
+  parser.add_argument("--port", type=int, default=8765, help="Port listened to on localhost (default: %(default)s)")
+  parser.add_argument("--socket", help="Unix socket to listen to instead of the port")
+  args = parser.parse_args()
+
+  try:
+    RequestHandler.service = DeckService(args.config)
+  except ValueError as error:
+    print(error)
+    exit(1)
+
+  if args.socket:
+    if os.path.exists(args.socket):
+      os.remove(args.socket)
+    server = UnixHTTPServer(args.socket, RequestHandler)
+    address = args.socket
+  else:
+    server = HTTPServer(("127.0.0.1", args.port), RequestHandler)
+    address = "http://127.0.0.1:%s" % args.port
+
+  print("{:<35} {:<15}".format("Deck: ", args.config))
+  print("{:<35} {:<15}".format("Number of cards in the pile: ", len(RequestHandler.service.card_pile)))
+  print("{:<35} {:<15}".format("Listening on: ", address))
+
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    print("\nEND OF CODE EXECUTION")
+  finally:
+    server.server_close()
+    RequestHandler.service.tag_cache.save()
+    if args.socket and os.path.exists(args.socket):
+      os.remove(args.socket)
+
+# =================================================================== #
+# =================================================================== #
+#                          CALL MAIN FUNCTION                         #
+# =================================================================== #
+# =================================================================== #
+
+if __name__ == "__main__":
+  main()
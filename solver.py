@@ -0,0 +1,423 @@
+import itertools
+import time
+from collections import OrderedDict
+
+import generator as gen
+import other_functions as of
+
+#############################################################################################
+
+class SearchTimeout(Exception):
+  """
+  Raised when the time budget of the search is spent.
+  """
+
+#############################################################################################
+
+def solve_list(cards:dict, names_list:list, theme_data:dict, time_budget:float=1.0, verbose:bool=False):
+  """
+  Alternative to generate_list that treats the list as a single constrained selection problem, solved by a depth-first branch-and-bound search.
+
+  The hard constraints are the number of cards of the list and the maxima of the mana curve, hard costs, statuses and limited tags.
+  The cost to minimize is, in order of priority, the number of missing restricted cards then the number of missing cards for each group of tags of the theme (in the order of the theme).
+  With the smart fill of the theme, the numbers of the groups add up as they do in generate_list, so that the cards missing from a group can be made up for by the next groups.
+
+  The search branches group by group: it first chooses the restricted cards, then the cards counted for each group of tags in turn, and finally the fillers that complete the list.
+  The cards are tried in the order of names_list (which is expected to be shuffled, as for generate_list), so that the random order breaks the ties and keeps the lists varied.
+  The list of generate_list is the starting point of the search, which only replaces it with a list of lower cost: the solver is never worse than the greedy selection.
+  The search stops as soon as a list reaches the lower bound of the cost (capped by the number of cards of the list), when all the possibilities have been explored or when the time budget (in seconds) is spent.
+
+  Returns the same results as generate_list, with the number of explored nodes and whether the list is proven optimal.
+  Raises ValueError if no complete list satisfies all the limitations, either because none exists or because none was found within the time budget.
+  """
+
+  inp_theme = theme_data['name']
+  number_cards = theme_data['number_cards']
+  smart_fill = theme_data['smart_fill']
+  curve_tracker = theme_data['curve_tracker'].copy()
+  hard_costs = theme_data['hard_costs']
+  masks = theme_data['masks']
+  restricted_mask = masks['restricted']
+  skip_mask = masks['excluded'] | masks['banned']
+
+  groups = list(theme_data['tags'].keys())
+  quotas = list(theme_data['tags'].values())
+  targets = list(itertools.accumulate(quotas)) if smart_fill else quotas
+  nb_groups = len(groups)
+  slots = range(len(curve_tracker.spots))
+
+  # Define the resources consumed by the cards besides their slot of the curve: the hard costs, the statuses and the limited tags
+
+  resources = [('costs', costs) for costs in hard_costs] + [('status', status) for status in theme_data['max_status']] + [('limited', tag) for tag in theme_data['limited_tags']]
+  maxima = list(hard_costs.values()) + list(theme_data['max_status'].values()) + list(theme_data['limited_tags'].values())
+  index = {resource: position for position, resource in enumerate(resources)}
+
+  # Gather the cards that can be chosen for this theme, with the resources they consume and the groups of tags they match
+
+  candidates = []
+
+  for name in names_list:
+
+    card_data = cards[name]
+    tags_mask = card_data['tags_mask']
+    restricted = bool(tags_mask & restricted_mask)
+
+    if tags_mask & skip_mask or (card_data['restricted'] and not restricted):
+      continue
+
+    # Hard costs are checked against empty counters, which only rejects the cards matching a hard cost that allows none
+    increase_current_costs = of.match_hard_costs(card_data['colour_counts'],theme_data['hard_costs_matchers'],{costs:0 for costs in hard_costs})
+    if increase_current_costs is False:
+      continue
+
+    card_status = dict(card_data['status'], restricted=restricted)
+
+    used = [index[('costs', costs)] for costs, increase in increase_current_costs.items() if increase]
+    used += [index[('status', status)] for status, value in card_status.items() if value]
+    used += [index[('limited', tag)] for tag, mask in masks['limited'].items() if tags_mask & mask]
+
+    if not curve_tracker.fits(card_data['mv']) or any(maxima[resource] < 1 for resource in used):
+      continue
+
+    candidates.append({
+      'data': card_data,
+      'status': card_status,
+      'restricted': restricted,
+      'used': used,
+      'scarce': any(maxima[resource] < number_cards for resource in used),
+      'slot': curve_tracker.slot(card_data['mv']),
+      'groups': [position for position, group in enumerate(groups) if tags_mask & masks['groups'][group]]
+    })
+
+  # Cards tried at each level of the search: the restricted cards, then the other cards matching each group of tags, and all the other cards as fillers
+  # (the restricted cards are only chosen at the first level, so that the number of restricted cards is settled once the search goes past it)
+
+  nb_candidates = len(candidates)
+  levels = [[position for position in range(nb_candidates) if candidates[position]['restricted']]]
+  levels += [[position for position in range(nb_candidates) if not candidates[position]['restricted'] and group in candidates[position]['groups']] for group in range(nb_groups)]
+  fillers = [position for position in range(nb_candidates) if not candidates[position]['restricted']]
+
+  # Count the cards matching each group by slot of the curve, as well as those that do not use any scarce resource (a resource that could run out before the list is complete), in total and after each position of each level, for the bounds
+
+  scarce = [position for position, maximum in enumerate(maxima) if maximum < number_cards]
+  matching = [[sum(1 for candidate in candidates if group in candidate['groups'] and candidate['slot'] == slot) for slot in slots] for group in range(nb_groups)]
+  matching_free = [sum(1 for candidate in candidates if group in candidate['groups'] and not candidate['scarce']) for group in range(nb_groups)]
+  left_in_level = []
+  free_in_level = []
+  for level in levels:
+    left = [[0] * len(slots) for position in range(len(level) + 1)]
+    free = [0] * (len(level) + 1)
+    for position in range(len(level) - 1, -1, -1):
+      left[position] = list(left[position + 1])
+      left[position][candidates[level[position]]['slot']] += 1
+      free[position] = free[position + 1] + (not candidates[level[position]]['scarce'])
+    left_in_level.append(left)
+    free_in_level.append(free)
+
+  wanted_restricted = min(len(levels[0]), theme_data['max_status']['restricted'])
+
+  state = {
+    'used': [0] * len(resources),
+    'filled': [0] * nb_groups,
+    'matched': [[0] * len(slots) for group in range(nb_groups)],
+    'matched_free': [0] * nb_groups,
+    'restricted': 0,
+    'left_slots': [0] * len(slots),
+    'left_free_slots': [0] * len(slots),
+    'is_chosen': [False] * nb_candidates,
+    'chosen': [],
+    'best_cost': None,
+    'best_list': None,
+    'best_curve': None,
+    'nodes': 0,
+    'deadline': time.perf_counter() + time_budget
+  }
+
+  for candidate in candidates:
+    if not candidate['restricted']:
+      state['left_slots'][candidate['slot']] += 1
+      state['left_free_slots'][candidate['slot']] += not candidate['scarce']
+
+  def room(group, filled):
+    """
+    Number of cards that can still be counted for the group.
+    """
+
+    if smart_fill:
+      return targets[group] - sum(filled[:group + 1])
+    return quotas[group] - filled[group]
+
+  def cost(restricted, filled):
+    """
+    Cost of a list with the given number of restricted cards and of cards counted for each group.
+    """
+
+    if smart_fill:
+      missing = [max(0, targets[group] - sum(filled[:group + 1])) for group in range(nb_groups)]
+    else:
+      missing = [max(0, quotas[group] - filled[group]) for group in range(nb_groups)]
+    return tuple([wanted_restricted - restricted] + missing)
+
+  def first_group(candidate, filled):
+    """
+    First group of tags matched by the card that is not full yet, if any.
+    """
+
+    return next((group for group in candidate['groups'] if room(group, filled) > 0), None)
+
+  def lower_bound(level, position):
+    """
+    Lowest cost any list completed from this point of the search can reach: the groups of the levels already searched are settled, the other ones are filled with as many of their cards as the room left in the list allows.
+    """
+
+    cards_left = number_cards - len(state['chosen'])
+    restricted = state['restricted']
+    filled = list(state['filled'])
+
+    if level == 0:
+      restricted += min(wanted_restricted - restricted, len(levels[0]) - position, cards_left)
+      # The restricted cards that could still be chosen also count for the groups, their place in the list is therefore not deducted
+
+    free = [curve_tracker.spots[slot] - curve_tracker.occupied[slot] for slot in slots]
+    scarce_room = sum(maxima[resource] - state['used'][resource] for resource in scarce)
+
+    for group in range(max(0, level - 1), nb_groups):
+      if group == level - 1:
+        left = left_in_level[level][position]
+        left_free = free_in_level[level][position]
+      else:
+        left = [matching[group][slot] - state['matched'][group][slot] for slot in slots]
+        left_free = matching_free[group] - state['matched_free'][group]
+      # The cards using scarce resources cannot outnumber the room left in those resources
+      available = min(sum(min(free[slot], left[slot]) for slot in slots), left_free + scarce_room)
+      added = max(0, min(room(group, filled), available, cards_left))
+      filled[group] += added
+      cards_left -= added
+
+    return cost(restricted, filled)
+
+  def fits(candidate):
+    return curve_tracker.fits(candidate['data']['mv']) and all(state['used'][resource] < maxima[resource] for resource in candidate['used'])
+
+  def can_complete():
+    """
+    Checks if there are enough cards left, and room for them on the curve, to complete the list.
+    As each card using a scarce resource takes one of what is left of it, those cards cannot outnumber what is left of all the scarce resources.
+    """
+
+    needed = number_cards - len(state['chosen'])
+    room_left = [curve_tracker.spots[slot] - curve_tracker.occupied[slot] for slot in slots]
+    if sum(min(room_left[slot], state['left_slots'][slot]) for slot in slots) < needed:
+      return False
+
+    scarce_left = sum(maxima[resource] - state['used'][resource] for resource in scarce)
+    return sum(min(room_left[slot], state['left_free_slots'][slot]) for slot in slots) + scarce_left >= needed
+
+  def choose(position, group):
+    candidate = candidates[position]
+    curve_tracker.add(candidate['data']['mv'])
+    for resource in candidate['used']:
+      state['used'][resource] += 1
+    if group is not None:
+      state['filled'][group] += 1
+    for matched in candidate['groups']:
+      state['matched'][matched][candidate['slot']] += 1
+      state['matched_free'][matched] += not candidate['scarce']
+    if candidate['restricted']:
+      state['restricted'] += 1
+    else:
+      state['left_slots'][candidate['slot']] -= 1
+      state['left_free_slots'][candidate['slot']] -= not candidate['scarce']
+    state['is_chosen'][position] = True
+    state['chosen'].append((candidate, group))
+
+  def undo(position, group):
+    candidate = candidates[position]
+    state['chosen'].pop()
+    state['is_chosen'][position] = False
+    if candidate['restricted']:
+      state['restricted'] -= 1
+    else:
+      state['left_slots'][candidate['slot']] += 1
+      state['left_free_slots'][candidate['slot']] += not candidate['scarce']
+    for matched in candidate['groups']:
+      state['matched'][matched][candidate['slot']] -= 1
+      state['matched_free'][matched] -= not candidate['scarce']
+    if group is not None:
+      state['filled'][group] -= 1
+    for resource in candidate['used']:
+      state['used'][resource] -= 1
+    curve_tracker.remove(candidate['data']['mv'])
+
+  def tick():
+    state['nodes'] += 1
+    if state['nodes'] % 1024 == 0 and time.perf_counter() > state['deadline']:
+      raise SearchTimeout
+
+  def fill(start):
+    """
+    Completes the list with fillers, which do not change its cost: the first complete list found is kept.
+    """
+
+    tick()
+
+    if len(state['chosen']) == number_cards:
+      state['best_cost'] = cost(state['restricted'], state['filled'])
+      state['best_list'] = list(state['chosen'])
+      state['best_curve'] = curve_tracker.snapshot()
+      return True
+
+    for filler in range(start, len(fillers)):
+      position = fillers[filler]
+      if not can_complete():
+        return False
+      if state['is_chosen'][position] or not fits(candidates[position]):
+        continue
+      choose(position, None)
+      complete = fill(filler + 1)
+      undo(position, None)
+      if complete:
+        return True
+
+    return False
+
+  def search(level, start):
+
+    tick()
+
+    bound = lower_bound(level, start)
+    if state['best_cost'] is not None and bound >= state['best_cost']:
+      return
+    if not can_complete():
+      return
+
+    if level > nb_groups:
+      fill(0)
+      return
+
+    # Choose another card for this level, if there is room for it, before moving on to the next level
+
+    if level == 0:
+      open_places = wanted_restricted - state['restricted']
+    else:
+      open_places = room(level - 1, state['filled'])
+
+    if open_places > 0 and len(state['chosen']) < number_cards:
+
+      for position in range(start, len(levels[level])):
+
+        candidate_position = levels[level][position]
+        candidate = candidates[candidate_position]
+        if state['is_chosen'][candidate_position] or not fits(candidate):
+          continue
+
+        group = first_group(candidate, state['filled']) if level == 0 else level - 1
+        choose(candidate_position, group)
+        search(level, position + 1)
+        undo(candidate_position, group)
+
+        if state['best_cost'] == root_bound:
+          return
+        # Both the bound and the room left can only get worse further in the cards of this level
+        if state['best_cost'] is not None and lower_bound(level, position + 1) >= state['best_cost']:
+          return
+
+    search(level + 1, 0)
+
+  # Start from the list of generate_list, as long as it is complete and within the limited tags (which generate_list does not check)
+
+  greedy_results = gen.generate_list(cards, names_list, theme_data)
+  by_name = {candidate['data']['name']: candidate for candidate in candidates}
+  greedy_list = [by_name.get(card['name']) for card in greedy_results['cards']]
+
+  if len(greedy_list) == number_cards and None not in greedy_list:
+    limited = [0] * len(resources)
+    restricted = 0
+    filled = [0] * nb_groups
+    for candidate in greedy_list:
+      for resource in candidate['used']:
+        limited[resource] += 1
+      restricted += candidate['restricted']
+      group = first_group(candidate, filled)
+      if group is not None:
+        filled[group] += 1
+    if all(count <= maximum for count, maximum in zip(limited, maxima)):
+      state['best_cost'] = cost(restricted, filled)
+
+  root_bound = lower_bound(0, 0)
+  optimal = True
+
+  try:
+    if state['best_cost'] != root_bound:
+      search(0, 0)
+  except SearchTimeout:
+    optimal = False
+
+  if state['best_list'] is None:
+
+    # Neither the greedy selection nor the search gave a complete list within the limitations
+
+    if state['best_cost'] is None:
+      if optimal:
+        raise ValueError("No list of %s cards satisfies the limitations of the %s theme (%s nodes explored)" % (number_cards, inp_theme, state['nodes']))
+      raise ValueError("No list of %s cards satisfying the limitations of the %s theme was found within the time budget of %s s (%s nodes explored)" % (number_cards, inp_theme, time_budget, state['nodes']))
+
+    if verbose:
+      if optimal:
+        print("Solver: %s nodes explored, the greedy list is already optimal" % state['nodes'])
+      else:
+        print("Solver: %s nodes explored, no better list than the greedy one found within the time budget" % state['nodes'])
+    return dict(greedy_results, nodes=state['nodes'], optimal=optimal)
+
+  # Build the results as generate_list does
+
+  card_list = []
+  filler_count = 0
+  curve_tracker.restore(state['best_curve'])
+  current_costs = {costs:0 for costs in hard_costs}
+  lim_status = {status: {'count': 0, 'max': maximum} for status, maximum in theme_data['max_status'].items()}
+
+  for candidate, group in state['best_list']:
+
+    card_data = candidate['data']
+
+    if candidate['restricted']:
+      reason = gen.list_reason(card_data, 'restricted')
+    elif group is not None:
+      reason = gen.list_reason(card_data, groups[group])
+    elif candidate['groups']:
+      reason = gen.list_reason(card_data, groups[candidate['groups'][0]])
+    else:
+      reason = gen.list_reason(card_data, 'filler')
+      filler_count += 1
+
+    for resource in candidate['used']:
+      kind, key = resources[resource]
+      if kind == 'costs':
+        current_costs[key] += 1
+      elif kind == 'status':
+        lim_status[key]['count'] += 1
+
+    if verbose:
+      print(card_data['name'],': ',card_data['mana_costs'])
+    card_list.append(gen.list_entry(card_data, reason, candidate['status']))
+
+  if verbose:
+    print("Solver: %s nodes explored, %s list" % (state['nodes'], "optimal" if optimal else "best found"))
+
+  theme_tags_numbers = OrderedDict(theme_data['tags'])
+  theme_tags_numbers['restricted'] = number_cards
+  theme_tags_numbers.move_to_end('restricted', last = False)
+  theme_tags_numbers['filler'] = number_cards
+
+  return {
+    "theme": inp_theme,
+    "cards": card_list,
+    "filler_count": filler_count,
+    "lim_status": lim_status,
+    "current_costs": current_costs,
+    "current_curve": curve_tracker.current_curve(),
+    "theme_tags": theme_tags_numbers,
+    "nodes": state['nodes'],
+    "optimal": optimal
+  }
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import mtg_tagger
+
+# Below this number of cards to tag, starting worker processes costs more than it saves
+
+MIN_PARALLEL_CARDS = 64
+
+# Tagger context of the worker processes (see init_worker)
+
+_worker = {}
+
+#############################################################################################
+
+def tagger_fingerprint(catalogs_list:list):
+  """
+  Computes a hash of the tagger (its source code, which includes the tagging rules) and of the catalogs it uses. Any change to either of them invalidates the cached tags.
+  """
+
+  fingerprint = hashlib.sha256()
+
+  with open(mtg_tagger.__file__, 'rb') as f:
+    fingerprint.update(f.read())
+
+  fingerprint.update("\n".join(catalogs_list).encode('utf-8'))
+
+  return fingerprint.hexdigest()
+
+#############################################################################################
+
+def card_fingerprint(card:dict):
+  """
+  Computes a hash of the Scryfall data of the card that is read by the tagger. Any change to those data invalidates the cached tags of the card.
+  """
+
+  tagged_data = {field:card.get(field) for field in mtg_tagger.TAGGED_FIELDS}
+
+  return hashlib.sha256(json.dumps(tagged_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+#############################################################################################
+
+def init_worker(catalogs_list:list):
+  """
+  Builds the tagger context of a worker process once, the tagging rules being compiled when mtg_tagger is imported by the process.
+  """
+
+  _worker['context'] = mtg_tagger.TaggerContext(catalogs_list)
+
+#############################################################################################
+
+def tag_chunk(cards:list, context:"mtg_tagger.TaggerContext"=None):
+  """
+  Computes the automatic tags of a chunk of cards, in the order of the chunk (see mtg_tagger.automatic_tags_many).
+  Without a context, the tagger context of the worker process is used (see init_worker).
+  """
+
+  return [card_tags for card_id, card_tags in mtg_tagger.automatic_tags_many(cards, context or _worker['context'])]
+
+#############################################################################################
+
+class TagCache:
+  """
+  Persistent cache of the automatic tags, stored as a JSON file and keyed by the Scryfall id of the cards.
+  The whole cache is discarded if the tagger or the catalogs have changed, and the tags of a card are recomputed if its Scryfall data have changed.
+  """
+
+  def __init__(self, file:str, catalogs_list:list):
+
+    self.file = file
+    self.catalogs_list = catalogs_list
+    self.context = mtg_tagger.TaggerContext(catalogs_list)
+    self.fingerprint = tagger_fingerprint(catalogs_list)
+    self.cards = {}
+    self.modified = False
+
+    if os.path.isfile(file):
+      try:
+        with open(file, 'r', encoding='utf-8') as f:
+          content = json.load(f)
+      except ValueError:
+        content = {}
+      if content.get('tagger') == self.fingerprint:
+        self.cards = content.get('cards',{})
+
+  def automatic_tags(self, card:dict):
+    """
+    Returns the automatic tags of the card (see mtg_tagger.automatic_tags), from the cache if they are up to date.
+    The returned dictionary is a copy that can be freely modified.
+    """
+
+    data_hash = card_fingerprint(card)
+    entry = self.cards.get(card['id'])
+
+    if entry is None or entry['data'] != data_hash:
+      entry = {
+        'oracle_id': card.get('oracle_id'),
+        'data': data_hash,
+        'tags': next(mtg_tagger.automatic_tags_many([card], self.context))[1]
+      }
+      self.cards[card['id']] = entry
+      self.modified = True
+
+    return {category:list(tags) for category, tags in entry['tags'].items()}
+
+  def pretag(self, cards:list, processes:int=None):
+    """
+    Computes up front the automatic tags of the given cards that are missing from the cache or out of date, splitting them across a pool of processes (the number of CPUs by default).
+    The tags are merged back into the cache in the order of the cards. If there are only a few cards to tag, they are tagged in this process.
+    """
+
+    missing = {}
+    for card in cards:
+      data_hash = card_fingerprint(card)
+      entry = self.cards.get(card['id'])
+      if (entry is None or entry['data'] != data_hash) and card['id'] not in missing:
+        missing[card['id']] = (card, data_hash)
+
+    if not missing:
+      return
+
+    to_tag = [card for card, data_hash in missing.values()]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(to_tag) < MIN_PARALLEL_CARDS:
+      tags = tag_chunk(to_tag, self.context)
+    else:
+      chunk_size = -(-len(to_tag) // (processes * 4))
+      chunks = [to_tag[start:start + chunk_size] for start in range(0, len(to_tag), chunk_size)]
+      with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(self.catalogs_list,)) as executor:
+        tags = [card_tags for chunk_tags in executor.map(tag_chunk, chunks) for card_tags in chunk_tags]
+
+    for (card, data_hash), card_tags in zip(missing.values(), tags):
+      self.cards[card['id']] = {
+        'oracle_id': card.get('oracle_id'),
+        'data': data_hash,
+        'tags': card_tags
+      }
+
+    self.modified = True
+
+  def save(self):
+    """
+    Writes the cache file if new tags have been computed since it was loaded.
+    """
+
+    if not self.modified:
+      return
+
+    with open(self.file, 'w', encoding='utf-8') as f:
+      json.dump({'tagger': self.fingerprint, 'cards': self.cards}, f, separators=(',', ':'))
+
+    self.modified = False
@@ -0,0 +1,163 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator as gen
+from card_store import CardStore
+from tag_cache import TagCache
+
+#############################################################################################
+
+class SecondaryTagsTest(unittest.TestCase):
+
+  def test_positive_conditions(self):
+
+    secondary_tags = gen.SecondaryTags({'counters': "riot, amplify", 'attack': "exert"})
+    self.assertEqual(secondary_tags.apply(['flying', 'riot']), ['counters'])
+    self.assertEqual(secondary_tags.apply(['exert', 'amplify']), ['counters', 'attack'])
+    self.assertEqual(secondary_tags.apply(['flying']), [])
+
+  def test_negated_conditions(self):
+
+    # A card lacking flying gets the tag, as well as a card having any of the positive conditions
+
+    secondary_tags = gen.SecondaryTags({'bad_synergy': "-flying, echo"})
+    self.assertEqual(secondary_tags.apply(['haste']), ['bad_synergy'])
+    self.assertEqual(secondary_tags.apply(['flying']), [])
+    self.assertEqual(secondary_tags.apply(['flying', 'echo']), ['bad_synergy'])
+
+  def test_chained_rules(self):
+
+    # The rules are given in the reverse order of their dependencies, the tags being still returned in the order of the configuration file
+
+    secondary_tags = gen.SecondaryTags({'bad_synergy': "-evasion", 'evasion': "flying, menace", 'menace': "intimidate"})
+    self.assertEqual(secondary_tags.apply(['intimidate']), ['evasion', 'menace'])
+    self.assertEqual(secondary_tags.apply(['flying']), ['evasion'])
+    self.assertEqual(secondary_tags.apply(['haste']), ['bad_synergy'])
+
+  def test_self_reference(self):
+
+    # A rule referring to its own tag only checks the tags of the card
+
+    secondary_tags = gen.SecondaryTags({'tribal': "tribal, dragon"})
+    self.assertEqual(secondary_tags.apply(['dragon']), ['tribal'])
+    self.assertEqual(secondary_tags.apply(['tribal']), ['tribal'])
+
+  def test_cycle(self):
+
+    with self.assertRaisesRegex(ValueError, "cycle: a -> b -> c -> a"):
+      gen.SecondaryTags({'a': "b", 'b': "c", 'c': "-a"})
+
+  def test_empty(self):
+
+    self.assertFalse(gen.SecondaryTags(None))
+    self.assertFalse(gen.SecondaryTags({}))
+    self.assertEqual(gen.SecondaryTags({}).apply(['flying']), [])
+
+#############################################################################################
+
+class SnapshotTest(unittest.TestCase):
+
+  def setUp(self):
+
+    self.directory = tempfile.TemporaryDirectory()
+    self.snapshot = os.path.join(self.directory.name, "snapshot.pickle")
+
+    self.card_pile = {"Card %s" % i: ['flying'] if i % 2 else ['echo'] for i in range(6)}
+    self.cards_data = [{'id': name, 'name': name, 'cmc': 4, 'mana_cost': "{3}{R}", 'edhrec_rank': 100 * (i + 1), 'legalities': {'commander': "legal"}} for i, name in enumerate(self.card_pile)]
+    self.config = {'general': {'auto_tagger': False}, 'secondary_tags': {'bad_synergy': "-flying"}}
+    self.catalogs = []
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def prepare(self, ranks:dict=None):
+    """
+    Prepares the cards with the snapshot and returns them with the names of the cards that were prepared again.
+    """
+
+    card_store = CardStore(self.cards_data)
+    tag_cache = TagCache(os.path.join(self.directory.name, "tags.json"), self.catalogs)
+
+    with mock.patch.object(gen, 'prepare_card', wraps=gen.prepare_card) as prepare_card:
+      cards = gen.prepare_cards(self.card_pile, card_store, self.config, tag_cache, ranks or gen.rank_limits(card_store), gen.TagBits(), self.snapshot)
+
+    return cards, [call.args[0] for call in prepare_card.call_args_list]
+
+  def test_unchanged(self):
+
+    cards, prepared = self.prepare()
+    self.assertEqual(len(prepared), 6)
+    self.assertTrue(os.path.isfile(self.snapshot))
+
+    reused, prepared = self.prepare()
+    self.assertEqual(prepared, [])
+    self.assertEqual(reused, cards)
+
+  def test_pile_changes(self):
+
+    self.prepare()
+
+    self.card_pile["Card 2"] = ['echo', 'only_burn']
+    cards, prepared = self.prepare()
+    self.assertEqual(prepared, ["Card 2"])
+    self.assertTrue(cards["Card 2"]['restricted'])
+
+    # New and removed cards
+
+    del self.card_pile["Card 3"]
+    self.card_pile["Card 9"] = ['flying']
+    self.cards_data.append({'id': "Card 9", 'name': "Card 9", 'cmc': 5, 'mana_cost': "{4}{R}", 'edhrec_rank': 50, 'legalities': {'commander': "legal"}})
+    cards, prepared = self.prepare()
+    self.assertEqual(prepared, ["Card 9"])
+    self.assertEqual(list(cards), list(self.card_pile))
+
+  def test_scryfall_changes(self):
+
+    self.prepare()
+
+    self.cards_data[1] = dict(self.cards_data[1], legalities={'commander': "banned"})
+    cards, prepared = self.prepare()
+    self.assertEqual(prepared, ["Card 1"])
+    self.assertTrue(cards["Card 1"]['status']['illegal'])
+
+  def test_settings_changes(self):
+
+    self.prepare()
+
+    # The secondary tags and the tagger (here its catalogs) invalidate the whole snapshot
+
+    self.config['secondary_tags'] = {'bad_synergy': "-flying, echo"}
+    cards, prepared = self.prepare()
+    self.assertEqual(len(prepared), 6)
+
+    self.catalogs = ["Dragon"]
+    cards, prepared = self.prepare()
+    self.assertEqual(len(prepared), 6)
+
+  def test_rank_changes(self):
+
+    cards, prepared = self.prepare()
+
+    # The rank limits do not invalidate the snapshot, the popularity statuses of the reused cards being computed again
+
+    ranks = {'median': 350, 'popular': 600, 'unpopular': 1000}
+    reused, prepared = self.prepare(ranks)
+    self.assertEqual(prepared, [])
+    self.assertTrue(all(card['status']['popular'] and not card['status']['unpopular'] for card in reused.values()))
+    self.assertEqual({name: card['tags'] for name, card in reused.items()}, {name: card['tags'] for name, card in cards.items()})
+
+  def test_unreadable_snapshot(self):
+
+    with open(self.snapshot, 'wb') as f:
+      f.write(b"not a pickle")
+
+    cards, prepared = self.prepare()
+    self.assertEqual(len(prepared), 6)
+
+if __name__ == "__main__":
+  unittest.main()
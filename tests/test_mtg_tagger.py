@@ -0,0 +1,84 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mtg_tagger
+
+CATALOGS = ["Creature", "Dragon", "Artifact", "Legendary"]
+
+def stub_card(name:str, oracle_text:str, type_line:str="Creature — Dragon"):
+  return {'id': name, 'name': name, 'type_line': type_line, 'keywords': [], 'set': "tst", 'oracle_text': oracle_text, 'mana_cost': "{4}{R}", 'colors': ["R"]}
+
+#############################################################################################
+
+class OracleTextTest(unittest.TestCase):
+
+  def setUp(self):
+    self.context = mtg_tagger.TaggerContext(CATALOGS)
+
+  def tags(self, card:dict):
+    return mtg_tagger.automatic_tags(card, self.context)
+
+  def test_counter_and_countered(self):
+
+    # "countered" must not hide "counter" (nor the reverse)
+
+    tags = self.tags(stub_card("Test Dragon", "This spell can't be countered.\nWhen this creature enters, put a +1/+1 counter on target creature."))
+    self.assertIn('uncounterable', tags['effects'])
+    self.assertIn('other_counters', tags['effects'])
+
+  def test_mentions(self):
+
+    oracle = mtg_tagger.OracleText("When Shivan\nDragon enters, draw a card.")
+    self.assertTrue(oracle.mentions("Shivan Dragon"))
+    self.assertTrue(oracle.mentions("shivan dragon"))
+    self.assertFalse(oracle.mentions("Niv-Mizzet"))
+
+    # The names that hold regex special characters or non-ASCII letters are always searched
+
+    self.assertTrue(oracle.mentions("Mr. Orfeo, the Boulder"))
+    self.assertTrue(oracle.mentions("Lim-Dûl"))
+
+  def test_name_patterns(self):
+
+    # The legacy patterns built from the name of the card are still searched when the name is mentioned
+
+    tags = self.tags(stub_card("Old Dragon", "When Old Dragon enters, you gain 2 life.\nReturn Old Dragon from your graveyard to your hand."))
+    self.assertIn('etb', tags['triggers'])
+    self.assertIn('self_recursion', tags['effects'])
+
+    tags = self.tags(stub_card("Hoarding Wyrm", "Old Dragon enters with two +1/+1 counters on it."))
+    self.assertNotIn('counters', tags['effects'])
+
+  def test_self_counters(self):
+
+    # "this creature" does not depend on the name of the card, which does not appear in the text
+
+    tags = self.tags(stub_card("Test Dragon", "{2}{R}: Put a +1/+1 counter on this creature."))
+    self.assertIn('counters', tags['effects'])
+
+    tags = self.tags(stub_card("Test Dragon", "Test Dragon enters with three +1/+1 counters on it."))
+    self.assertIn('counters', tags['effects'])
+
+#############################################################################################
+
+class CatalogIndexTest(unittest.TestCase):
+
+  def test_non_prefix(self):
+
+    catalogs = mtg_tagger.CatalogIndex(["Creature", "Elf", "Noble"])
+    self.assertIn("creature", catalogs)
+    self.assertIn("noncreature", catalogs)
+    self.assertIn("noble", catalogs)
+    self.assertIn("nonnoble", catalogs)
+
+    # Only the whole "non" prefix is removed, not any leading "n" and "o" letters
+
+    self.assertNotIn("nelf", catalogs)
+    self.assertNotIn("oonelf", catalogs)
+    self.assertNotIn("ble", catalogs)
+
+if __name__ == "__main__":
+  unittest.main()
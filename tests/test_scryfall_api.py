@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+import threading
+import unittest
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scryfall_api
+
+# Stub of the Scryfall API: every name is a known card, except the UNKNOWN ones, and the REPRINTS are returned as reprints by the collection endpoint
+
+UNKNOWN = {"Unknown Card %s" % i for i in range(3)}
+REPRINTS = {"Card %s" % i for i in range(0, 160, 16)}
+
+def stub_card(card_name:str, reprint:bool=False):
+  return {'object': 'card', 'id': card_name, 'name': card_name, 'reprint': reprint}
+
+#############################################################################################
+
+class StubHandler(BaseHTTPRequestHandler):
+
+  requests = []
+
+  def do_POST(self):
+
+    length = int(self.headers.get('Content-Length', 0))
+    payload = json.loads(self.rfile.read(length))
+    self.requests.append(self.path)
+
+    names = [identifier['name'] for identifier in payload['identifiers']]
+    self.answer(200, {
+      'object': 'list',
+      'not_found': [{'name': name} for name in names if name in UNKNOWN],
+      'data': [stub_card(name, name in REPRINTS) for name in names if name not in UNKNOWN]
+    })
+
+  def do_GET(self):
+
+    path, query = self.path.split("?", 1)
+    self.requests.append(path)
+
+    card_name = urllib.parse.parse_qs(query)['q'][0].split('"')[1]
+    if card_name in UNKNOWN:
+      self.answer(404, {'object': 'error', 'status': 404, 'code': 'not_found', 'details': "No cards found"})
+    else:
+      self.answer(200, {'object': 'list', 'data': [stub_card(card_name)]})
+
+  def answer(self, code:int, content:dict):
+
+    body = json.dumps(content).encode('utf-8')
+    self.send_response(code)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+#############################################################################################
+
+class FetchCardsTest(unittest.TestCase):
+
+  def setUp(self):
+
+    StubHandler.requests = []
+    self.server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    self.thread.start()
+    self.api_url = "http://127.0.0.1:%s" % self.server.server_port
+
+  def tearDown(self):
+
+    self.server.shutdown()
+    self.server.server_close()
+
+  def test_request_count(self):
+
+    # A pile of 160 cards, 10 of them returned as reprints and 3 unknown to Scryfall
+
+    card_names = ["Card %s" % i for i in range(160)] + sorted(UNKNOWN)
+    errors = {}
+
+    cards = scryfall_api.fetch_cards(card_names, self.api_url, progress=lambda message: None, errors=errors)
+
+    # One request per batch of COLLECTION_SIZE names, then one search per reprint or unknown name
+
+    self.assertEqual(StubHandler.requests.count("/cards/collection"), 3)
+    self.assertEqual(StubHandler.requests.count("/cards/search"), len(REPRINTS) + len(UNKNOWN))
+    self.assertEqual(len(StubHandler.requests), 3 + len(REPRINTS) + len(UNKNOWN))
+
+    self.assertEqual(set(cards), {"Card %s" % i for i in range(160)})
+    self.assertTrue(all(not cards[card_name]['reprint'] for card_name in REPRINTS))
+    self.assertEqual(set(errors), UNKNOWN)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,114 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator as gen
+import solver
+from card_store import CardStore
+from tag_cache import TagCache
+
+# Small pile of 16 cards: four cards of each mana value from 2 to 5, two of them creatures, the burn spells and the dragons sharing some cards
+
+PILE = {
+  "Card %s" % i: [tag for tag, has_tag in (('type_creature', i // 4 % 2 == 0), ('burn', i % 3 == 0), ('dragon', i % 4 == 1)) if has_tag]
+  for i in range(16)
+}
+
+def stub_card(name:str, index:int):
+  return {'id': name, 'name': name, 'cmc': 2 + index % 4, 'mana_cost': "{%s}{R}" % (1 + index % 4), 'edhrec_rank': 100 * (index + 1), 'legalities': {'commander': "legal"}}
+
+def stub_config(limitations:dict=None, smart_fill:bool=True):
+  return {
+    'general': {'number_cards': 8, 'auto_tagger': False},
+    'limitations': {'mana_curve': {2: 2, 3: 2, 4: 2, 5: 2}, 'hard_costs': {'WW': 1}},
+    'themes': {'Burn': {'description': "", 'tags': {'burn': 4, 'dragon': 2}, 'smart_fill': smart_fill, 'limitations': limitations or {}}}
+  }
+
+#############################################################################################
+
+class SolverTest(unittest.TestCase):
+
+  def setUp(self):
+
+    self.directory = tempfile.TemporaryDirectory()
+    self.card_store = CardStore([stub_card(name, index) for index, name in enumerate(PILE)])
+    self.tag_cache = TagCache(os.path.join(self.directory.name, "tags.json"), [])
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def prepare(self, config:dict):
+
+    tag_bits = gen.TagBits()
+    ranks = gen.rank_limits(self.card_store)
+    cards = gen.prepare_cards(PILE, self.card_store, config, self.tag_cache, ranks, tag_bits)
+    theme_data = gen.load_theme(config, 'Burn', tag_bits, len(PILE))
+
+    return cards, theme_data
+
+  def check_list(self, results:dict, cards:dict, theme_data:dict):
+
+    names = [card['name'] for card in results['cards']]
+    self.assertEqual(len(names), theme_data['number_cards'])
+    self.assertEqual(len(set(names)), len(names))
+
+    for tag, maximum in theme_data['limited_tags'].items():
+      self.assertLessEqual(sum(tag in cards[name]['tags'] for name in names), maximum)
+
+    curve = {}
+    for name in names:
+      mana_value = cards[name]['mv']
+      curve[mana_value] = curve.get(mana_value, 0) + 1
+    for mana_value, number in curve.items():
+      self.assertLessEqual(number, theme_data['curve'][mana_value])
+
+  def test_limited_tags(self):
+
+    config = stub_config({'limited_tags': {'type_creature': 2}})
+    cards, theme_data = self.prepare(config)
+
+    for seed in range(5):
+      names_list = list(PILE)
+      random.Random(seed).shuffle(names_list)
+      self.check_list(solver.solve_list(cards, names_list, theme_data, 1.0), cards, theme_data)
+
+  def test_infeasible(self):
+
+    # With 2 spots per mana value, the 8 non-creatures of the pile make the only list without creatures
+
+    cards, theme_data = self.prepare(stub_config({'limited_tags': {'type_creature': 0}}))
+    results = solver.solve_list(cards, list(PILE), theme_data, 1.0)
+    self.check_list(results, cards, theme_data)
+    self.assertTrue(all('type_creature' not in cards[card['name']]['tags'] for card in results['cards']))
+
+    # With 3 spots for the mana values 2 and 3, there are not enough non-creatures left to fill the list, which the greedy selection ignores
+
+    cards, theme_data = self.prepare(stub_config({'limited_tags': {'type_creature': 0}, 'mana_curve': {2: 3, 3: 3, 4: 1, 5: 1}}))
+    self.assertEqual(len(gen.generate_list(cards, list(PILE), theme_data)['cards']), 8)
+
+    with self.assertRaisesRegex(ValueError, "No list of 8 cards satisfies"):
+      solver.solve_list(cards, list(PILE), theme_data, 1.0)
+
+  def test_not_worse_than_greedy(self):
+
+    for smart_fill in (True, False):
+      cards, theme_data = self.prepare(stub_config(smart_fill=smart_fill))
+
+      for seed in range(5):
+        names_list = list(PILE)
+        random.Random(seed).shuffle(names_list)
+
+        greedy = gen.generate_list(cards, names_list, theme_data)
+        solved = solver.solve_list(cards, names_list, theme_data, 1.0)
+        self.check_list(solved, cards, theme_data)
+        self.assertTrue(solved['optimal'])
+
+        chosen = lambda results, tag: sum(tag in cards[card['name']]['tags'] for card in results['cards'])
+        self.assertGreaterEqual(min(chosen(solved, 'burn'), 4), min(chosen(greedy, 'burn'), 4))
+
+if __name__ == "__main__":
+  unittest.main()